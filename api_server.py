@@ -4,20 +4,41 @@ FastAPI Server for N8N Workflow Documentation
 High-performance API with sub-100ms response times.
 """
 
-from fastapi import FastAPI, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi.responses import HTMLResponse, FileResponse, JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from pydantic import BaseModel, field_validator
-from typing import Optional, List, Dict, Any
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Dict, Any, Iterator, Tuple
+import csv
+import datetime
+import email.utils
+import hashlib
+import io
 import json
+import mimetypes
 import os
+import re
 import asyncio
+import gc
+import signal
+import sqlite3
+import time
 from pathlib import Path
+from starlette.datastructures import Headers
+from starlette.responses import Response as StarletteResponse
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
 import uvicorn
 
-from workflow_db import WorkflowDatabase
+from workflow_db import WorkflowDatabase, AsyncWorkflowDatabase, INDEX_VERSION, DIAGRAM_VERSION
+from workflow_compression import MINIMUM_SIZE, PrecompressedStore, StaticVariants, accepted_encodings, compress
+from workflow_admission import AdmissionControlMiddleware, ConcurrencyLimit, route_limit
+from workflow_metrics import REGISTRY, CallbackCounter, CallbackGauge, MetricsMiddleware, cache_result
+from workflow_timing import (CompressionTimingMiddleware, ServerTimingMiddleware, configure_timing, decode_json,
+                             phase, timed_endpoint, timed_handler)
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -26,8 +47,39 @@ app = FastAPI(
     version="2.0.0"
 )
 
-# Add middleware for performance
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+class TimedRoute(APIRoute):
+    """APIRoute that tells endpoint time apart from validation and serialization (see workflow_timing)."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        return timed_handler(super().get_route_handler())
+
+app.router.route_class = TimedRoute
+
+# Concurrency caps for expensive routes (per worker process): beyond the
+# limit requests queue; a full queue sheds with 429, a timed-out wait with 503
+ROUTE_LIMITS = [
+    route_limit("GET", r"/api/workflows/export", ConcurrencyLimit("export", limit=2, queue=8, timeout=30)),
+    route_limit("GET", r"/api/workflows/bulk-download", ConcurrencyLimit("bulk download", limit=2, queue=8, timeout=30)),
+    route_limit("POST", r"/api/workflows/batch", ConcurrencyLimit("batch search", limit=8, queue=32, timeout=10)),
+    route_limit("GET", r"/api/workflows/[^/]+/diagram", ConcurrencyLimit("diagram", limit=4, queue=32, timeout=10)),
+    route_limit("GET", r"/api/workflows/[^/]+/similar", ConcurrencyLimit("similar", limit=4, queue=32, timeout=10)),
+    route_limit("GET", r"/api/workflows/[^/]+/download", ConcurrencyLimit("download", limit=16, queue=64, timeout=10)),
+    route_limit("GET", r"/api/workflows/[^/]+", ConcurrencyLimit("detail", limit=16, queue=64, timeout=10)),
+]
+
+# Add middleware for performance (the last added runs first)
+app.add_middleware(AdmissionControlMiddleware, limits=ROUTE_LIMITS)
+# Per-request Server-Timing (off unless WORKFLOW_SERVER_TIMING=1 or --server-timing);
+# the two halves bracket GZipMiddleware to measure compression
+app.add_middleware(CompressionTimingMiddleware)
+# Dynamic compression for API responses only: static assets and workflow files
+# are served from precompressed variants (with Content-Encoding set, which the
+# middleware leaves alone), so a moderate level keeps per-request CPU low.
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+app.add_middleware(ServerTimingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -35,16 +87,51 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so latency includes admission queueing and compression
+app.add_middleware(MetricsMiddleware)
+
+# Set by serve_workers when uvicorn spawns the workers (no os.fork): each
+# imports this module and labels its metrics with its pid
+METRICS_WORKER_ENV = "WORKFLOW_METRICS_WORKER"
+if os.environ.get(METRICS_WORKER_ENV) == "pid":
+    REGISTRY.set_worker(str(os.getpid()))
 
-# Initialize database
+# Initialize database; request handlers go through the thread pool so
+# queries and file reads never block the event loop
 db = WorkflowDatabase()
+adb = AsyncWorkflowDatabase(db)
+static_variants = StaticVariants(PrecompressedStore(os.path.join(f"{db.db_path}.compressed", "static")))
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves stored gzip/brotli variants when the client accepts them."""
+    
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope,
+                      status_code: int = 200) -> StarletteResponse:
+        variant = static_variants.lookup(str(full_path), stat_result, Headers(scope=scope).get("accept-encoding", ""))
+        cache_result('static_variant', variant is not None)
+        if variant is None:
+            return super().file_response(full_path, stat_result, scope, status_code)
+        
+        variant_path, encoding = variant
+        response = FileResponse(
+            variant_path,
+            status_code=status_code,
+            media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            stat_result=os.stat(variant_path)
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+static_files = PrecompressedStaticFiles(directory="static", check_dir=False)
 
 # Startup function to verify database
 @app.on_event("startup")
 async def startup_event():
     """Verify database connectivity on startup."""
     try:
-        stats = db.get_stats()
+        stats = await adb.get_stats()
         if stats['total'] == 0:
             print("⚠️  Warning: No workflows found in database. Run indexing first.")
         else:
@@ -52,6 +139,16 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
         raise
+    
+    # Compress static assets now; workflow files without variants (e.g. a
+    # database indexed by an older version) are compressed in the background
+    prepared = await adb.run_io(static_variants.prepare, "static")
+    print(f"✅ Precompressed static assets: {prepared} files")
+    adb.run_in_background(db.precompress_workflows)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    adb.shutdown()
 
 # Response models
 class WorkflowSummary(BaseModel):
@@ -67,6 +164,7 @@ class WorkflowSummary(BaseModel):
     tags: List[str] = []
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
+    category: str = "Uncategorized"
     
     class Config:
         # Allow conversion of int to bool for active field
@@ -89,6 +187,67 @@ class SearchResponse(BaseModel):
     query: str
     filters: Dict[str, Any]
 
+SEARCH_MODE_PATTERN = "^(keyword|semantic)$"
+SORT_PATTERN = "^(name|node_count|updated_at|created_at|complexity)$"
+ORDER_PATTERN = "^(asc|desc)$"
+
+class SearchSpec(BaseModel):
+    q: str = ""
+    trigger: str = "all"
+    complexity: str = "all"
+    category: str = "all"
+    active_only: bool = False
+    mode: str = Field("keyword", pattern=SEARCH_MODE_PATTERN)
+    sort: Optional[str] = Field(None, pattern=SORT_PATTERN)
+    order: str = Field("asc", pattern=ORDER_PATTERN)
+    page: int = Field(1, ge=1)
+    per_page: int = Field(20, ge=1, le=100)
+
+class BatchSearchRequest(BaseModel):
+    queries: List[SearchSpec] = Field(..., min_length=1, max_length=50)
+
+class BatchSearchResponse(BaseModel):
+    results: List[SearchResponse]
+
+class SimilarWorkflow(WorkflowSummary):
+    similarity: float
+
+class SimilarResponse(BaseModel):
+    filename: str
+    workflows: List[SimilarWorkflow]
+    total: int
+
+class CooccurringIntegration(BaseModel):
+    name: str
+    count: int
+
+class IntegrationSummary(BaseModel):
+    name: str
+    workflow_count: int
+    active_count: int
+    triggers: Dict[str, int]
+    top_cooccurring: List[CooccurringIntegration]
+
+class IntegrationsResponse(BaseModel):
+    integrations: List[IntegrationSummary]
+    count: int
+    page: int
+    per_page: int
+    pages: int
+    prefix: str
+
+class IntegrationPair(BaseModel):
+    integration: str
+    other: str
+    count: int
+    lift: float
+    pmi: float
+
+class IntegrationPairsResponse(BaseModel):
+    pairs: List[IntegrationPair]
+    rank: str
+    min_count: int
+
 class StatsResponse(BaseModel):
     total: int
     active: int
@@ -99,8 +258,152 @@ class StatsResponse(BaseModel):
     unique_integrations: int
     last_indexed: str
 
+# Fast path for search pages: rows go straight from sqlite3.Row to JSON text.
+# The routes keep response_model=SearchResponse for the OpenAPI schema, but
+# return the encoded bytes directly, so no per-row Pydantic models are built.
+quote = json.encoder.encode_basestring  # C-accelerated JSON string quoting
+
+def encode_optional(value: Optional[str]) -> str:
+    return "null" if value is None else quote(value)
+
+def encode_tags(tags_json: Optional[str]) -> str:
+    """Stored tags as a JSON list of strings (tag objects are reduced to their names)."""
+    if not tags_json or tags_json == "[]":
+        return "[]"
+    tags = [
+        tag.get('name', str(tag.get('id', 'tag'))) if isinstance(tag, dict) else str(tag)
+        for tag in decode_json(tags_json)
+    ]
+    return json.dumps(tags, ensure_ascii=False)
+
+def encode_workflow_summary(row) -> str:
+    """Encode a workflows row as a WorkflowSummary JSON object.
+    
+    integrations is stored by the indexer as a JSON list of strings and is
+    spliced in as-is; missing values get the model defaults.
+    """
+    return (
+        f'{{"id":{"null" if row["id"] is None else int(row["id"])},'
+        f'"filename":{quote(row["filename"] or "")},'
+        f'"name":{quote(row["name"] or "")},'
+        f'"active":{"true" if row["active"] else "false"},'
+        f'"description":{quote(row["description"] or "")},'
+        f'"trigger_type":{quote(row["trigger_type"] or "Manual")},'
+        f'"complexity":{quote(row["complexity"] or "low")},'
+        f'"node_count":{int(row["node_count"] or 0)},'
+        f'"integrations":{row["integrations"] or "[]"},'
+        f'"tags":{encode_tags(row["tags"])},'
+        f'"created_at":{encode_optional(row["created_at"])},'
+        f'"updated_at":{encode_optional(row["updated_at"])},'
+        f'"category":{quote(row["category"] or "Uncategorized")}}}'
+    )
+
+def encode_search_response(rows: List, total: int, page: int, per_page: int,
+                           query: str, filters: Dict[str, Any]) -> bytes:
+    """Encode a page of rows as a SearchResponse JSON body."""
+    pages = (total + per_page - 1) // per_page  # Ceiling division
+    return (
+        '{"workflows":[' + ",".join(encode_workflow_summary(row) for row in rows) + '],'
+        f'"total":{total},"page":{page},"per_page":{per_page},"pages":{pages},'
+        f'"query":{quote(query)},"filters":{json.dumps(filters, ensure_ascii=False)}}}'
+    ).encode('utf-8')
+
+def check_search_spec(spec: SearchSpec):
+    """Reject sort with mode=semantic: results are ranked by relevance, so it would be ignored."""
+    if spec.mode == "semantic" and spec.sort:
+        raise HTTPException(status_code=400, detail="sort is not supported with mode=semantic (results are ranked by relevance)")
+
+def run_search(spec: SearchSpec, conn=None) -> bytes:
+    """Run one search spec (optionally on a shared connection) and encode the page."""
+    filters = dict(
+        trigger_filter=spec.trigger,
+        complexity_filter=spec.complexity,
+        category_filter=spec.category,
+        active_only=spec.active_only,
+        limit=spec.per_page,
+        offset=(spec.page - 1) * spec.per_page,
+        conn=conn,
+        raw_rows=True
+    )
+    if spec.mode == "semantic":
+        rows, total = db.semantic_search(spec.q, **filters)
+    else:
+        rows, total = db.search_workflows(spec.q, sort=spec.sort, order=spec.order, **filters)
+    
+    with phase("serialize"):
+        return encode_search_response(
+            rows, total, spec.page, spec.per_page, query=spec.q,
+            filters={
+                "trigger": spec.trigger,
+                "complexity": spec.complexity,
+                "category": spec.category,
+                "active_only": spec.active_only,
+                "mode": spec.mode,
+                "sort": spec.sort,
+                "order": spec.order
+            }
+        )
+
+def run_batch(specs: List[SearchSpec]) -> bytes:
+    """Run several search specs on one connection inside one read transaction."""
+    with db.read_transaction() as conn:
+        results = [run_search(spec, conn=conn) for spec in specs]
+    return b'{"results":[' + b",".join(results) + b']}'
+
+def load_json_file(file_path: Path) -> Any:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def utc_epoch(timestamp: Optional[str]) -> Optional[float]:
+    """Parse a UTC 'YYYY-MM-DD HH:MM:SS' timestamp (SQLite CURRENT_TIMESTAMP) to epoch seconds."""
+    if not timestamp:
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    return moment.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+def http_date(timestamp: Optional[str]) -> Optional[str]:
+    """Format a UTC SQLite timestamp as an HTTP date."""
+    epoch = utc_epoch(timestamp)
+    return email.utils.formatdate(epoch, usegmt=True) if epoch is not None else None
+
+def cache_headers(etag: str, last_modified: Optional[str]) -> Dict[str, str]:
+    """Validator headers; no-cache makes clients revalidate (cheaply) on every use."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+def not_modified(request: Request, etag: str, last_modified: Optional[str],
+                 vary: Optional[str] = None) -> Optional[Response]:
+    """Return a 304 response if the client's validators still match, else None."""
+    headers = cache_headers(etag, last_modified)
+    if vary:
+        headers["Vary"] = vary
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as required for If-None-Match
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+        matched = "*" in tags or etag in tags
+        cache_result('conditional', matched)
+        return Response(status_code=304, headers=headers) if matched else None
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            matched = email.utils.parsedate_to_datetime(last_modified) <= email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            matched = False
+        cache_result('conditional', matched)
+        if matched:
+            return Response(status_code=304, headers=headers)
+    return None
+
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Serve the main documentation page."""
     static_dir = Path("static")
     index_file = static_dir / "index.html"
@@ -112,7 +415,7 @@ async def root():
         <p>Current directory: """ + str(Path.cwd()) + """</p>
         </body></html>
         """)
-    return FileResponse(str(index_file))
+    return await adb.run_io(static_files.file_response, str(index_file), index_file.stat(), request.scope)
 
 @app.get("/health")
 async def health_check():
@@ -120,10 +423,17 @@ async def health_check():
     return {"status": "healthy", "message": "N8N Workflow API is running"}
 
 @app.get("/api/stats", response_model=StatsResponse)
-async def get_stats():
+async def get_stats(request: Request, response: Response):
     """Get workflow database statistics."""
     try:
-        stats = db.get_stats()
+        generation, generated_at = await adb.get_index_generation()
+        etag, last_modified = f'"stats-{generation}"', http_date(generated_at)
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
+        
+        stats = await adb.get_stats()
+        response.headers.update(cache_headers(etag, last_modified))
         return StatsResponse(**stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
@@ -135,116 +445,313 @@ async def search_workflows(
     complexity: str = Query("all", description="Filter by complexity"),
     category: str = Query("all", description="Filter by category"),
     active_only: bool = Query(False, description="Show only active workflows"),
+    mode: str = Query("keyword", pattern=SEARCH_MODE_PATTERN, description="Search mode: keyword (FTS) or semantic (TF-IDF)"),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN, description="Sort by name, node_count, updated_at, created_at or complexity"),
+    order: str = Query("asc", pattern=ORDER_PATTERN, description="Sort direction"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page")
 ):
-    """Search and filter workflows with pagination."""
+    """Search and filter workflows with pagination.
+    
+    mode=semantic ranks results by relevance and cannot be combined with sort (400).
+    """
+    spec = SearchSpec(
+        q=q, trigger=trigger, complexity=complexity, category=category,
+        active_only=active_only, mode=mode, sort=sort, order=order,
+        page=page, per_page=per_page
+    )
+    check_search_spec(spec)
     try:
-        offset = (page - 1) * per_page
-        
-        workflows, total = db.search_workflows(
+        body = await adb.run(run_search, spec)
+        return Response(content=body, media_type="application/json")
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching workflows: {str(e)}")
+
+@app.post("/api/workflows/batch", response_model=BatchSearchResponse)
+async def batch_search_workflows(request: BatchSearchRequest):
+    """Run several searches on one connection inside one read transaction."""
+    for spec in request.queries:
+        check_search_spec(spec)
+    try:
+        body = await adb.run(run_batch, request.queries)
+        return Response(content=body, media_type="application/json")
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running batch search: {str(e)}")
+
+EXPORT_CHUNK_ROWS = 200
+
+def export_ndjson(workflows: Iterator[Dict]) -> Iterator[bytes]:
+    """Encode workflows as newline-delimited JSON, a chunk of rows at a time."""
+    fields = list(WorkflowSummary.model_fields)
+    chunk = []
+    for workflow in workflows:
+        record = {field: workflow.get(field) for field in fields}
+        record['active'] = bool(record['active'])
+        chunk.append(json.dumps(record, ensure_ascii=False))
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield ("\n".join(chunk) + "\n").encode('utf-8')
+            chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode('utf-8')
+
+def export_csv(workflows: Iterator[Dict]) -> Iterator[bytes]:
+    """Encode workflows as CSV (list fields joined with ';'), a chunk of rows at a time."""
+    fields = list(WorkflowSummary.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    rows = 0
+    for workflow in workflows:
+        record = []
+        for field in fields:
+            value = workflow.get(field)
+            if isinstance(value, list):
+                value = ';'.join(str(item) for item in value)
+            elif field == 'active':
+                value = int(bool(value))
+            record.append(value)
+        writer.writerow(record)
+        rows += 1
+        if rows % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+@app.get("/api/workflows/export")
+async def export_workflows(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format"),
+    q: str = Query("", description="Search query"),
+    trigger: str = Query("all", description="Filter by trigger type"),
+    complexity: str = Query("all", description="Filter by complexity"),
+    category: str = Query("all", description="Filter by category"),
+    active_only: bool = Query(False, description="Show only active workflows"),
+    sort: Optional[str] = Query(None, pattern=SORT_PATTERN, description="Sort key"),
+    order: str = Query("asc", pattern=ORDER_PATTERN, description="Sort direction")
+):
+    """Stream every matching workflow as NDJSON or CSV from a single database cursor."""
+    # The query runs before the response starts, so its errors still get a status
+    try:
+        workflows = await adb.run(
+            db.iter_workflows,
             query=q,
             trigger_filter=trigger,
             complexity_filter=complexity,
             category_filter=category,
             active_only=active_only,
-            limit=per_page,
-            offset=offset
+            sort=sort,
+            order=order
         )
-        
-        # Convert to Pydantic models with error handling
-        workflow_summaries = []
-        for workflow in workflows:
-            try:
-                # Remove extra fields that aren't in the model
-                clean_workflow = {
-                    'id': workflow.get('id'),
-                    'filename': workflow.get('filename', ''),
-                    'name': workflow.get('name', ''),
-                    'active': workflow.get('active', False),
-                    'description': workflow.get('description', ''),
-                    'trigger_type': workflow.get('trigger_type', 'Manual'),
-                    'complexity': workflow.get('complexity', 'low'),
-                    'node_count': workflow.get('node_count', 0),
-                    'integrations': workflow.get('integrations', []),
-                    'tags': workflow.get('tags', []),
-                    'created_at': workflow.get('created_at'),
-                    'updated_at': workflow.get('updated_at')
-                }
-                workflow_summaries.append(WorkflowSummary(**clean_workflow))
-            except Exception as e:
-                print(f"Error converting workflow {workflow.get('filename', 'unknown')}: {e}")
-                # Continue with other workflows instead of failing completely
-                continue
-        
-        pages = (total + per_page - 1) // per_page  # Ceiling division
-        
-        return SearchResponse(
-            workflows=workflow_summaries,
-            total=total,
-            page=page,
-            per_page=per_page,
-            pages=pages,
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting workflows: {str(e)}")
+    if format == "csv":
+        body, media_type = export_csv(workflows), "text/csv; charset=utf-8"
+    else:
+        body, media_type = export_ndjson(workflows), "application/x-ndjson"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="workflows.{format}"'}
+    )
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range "bytes=" header into [start, end), or None to send the whole body.
+    
+    Raises ValueError if the range cannot be satisfied.
+    """
+    if not range_header:
+        return None
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None  # Unsupported unit or multiple ranges: ignore (RFC 9110 allows this)
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last) + 1, size) if last else size
+        else:
+            start, end = max(size - int(last), 0), size
+    except ValueError:
+        return None
+    if start >= size or start >= end:
+        raise ValueError(range_header)
+    return start, end
+
+@app.get("/api/workflows/bulk-download")
+async def bulk_download_workflows(
+    request: Request,
+    filenames: List[str] = Query([], description="Workflow filenames (repeatable); overrides the filters"),
+    q: str = Query("", description="Search query"),
+    trigger: str = Query("all", description="Filter by trigger type"),
+    complexity: str = Query("all", description="Filter by complexity"),
+    category: str = Query("all", description="Filter by category"),
+    active_only: bool = Query(False, description="Show only active workflows")
+):
+    """Stream a ZIP of the selected workflows, with Range support for resuming."""
+    try:
+        archive = await adb.archive_workflows(
+            filenames=filenames,
             query=q,
-            filters={
-                "trigger": trigger,
-                "complexity": complexity,
-                "category": category,
-                "active_only": active_only
-            }
+            trigger_filter=trigger,
+            complexity_filter=complexity,
+            category_filter=category,
+            active_only=active_only
         )
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error searching workflows: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error preparing archive: {str(e)}")
+    
+    if not archive.members:
+        raise HTTPException(status_code=404, detail="No workflow files match the selection")
+    
+    etag = f'"{archive.fingerprint}"'
+    cached = not_modified(request, etag, None)
+    if cached:
+        return cached
+    
+    name = "workflows" if category == "all" or filenames else re.sub(r'[^A-Za-z0-9]+', '-', category).strip('-').lower()
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{name or "workflows"}.zip"'
+    }
+    
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_byte_range(request.headers.get("range"), archive.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{archive.size}"})
+    
+    if byte_range is None:
+        start, end, status_code = 0, archive.size, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{archive.size}"
+    headers["Content-Length"] = str(end - start)
+    
+    return StreamingResponse(
+        archive.iter_bytes(start, end),
+        status_code=status_code,
+        media_type="application/zip",
+        headers=headers
+    )
+
+def workflow_variant(request: Request, workflow_meta: Dict) -> Optional[Tuple[Path, str]]:
+    """Stored compressed variant of a workflow file the client accepts, as (path, encoding), or None."""
+    variant = db.compressed_workflows.lookup(workflow_meta["file_hash"], request.headers.get("accept-encoding", ""))
+    cache_result('workflow_variant', variant is not None)
+    return variant
+
+def workflow_file_response(file_path: Path, variant: Optional[Tuple[Path, str]],
+                           headers: Dict[str, str], filename: Optional[str] = None) -> FileResponse:
+    """Serve a workflow file, or the compressed variant chosen by workflow_variant."""
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    if variant is not None:
+        file_path, encoding = variant
+        headers["Content-Encoding"] = encoding
+    return FileResponse(file_path, media_type="application/json", filename=filename, headers=headers)
+
+def workflow_validators(workflow_meta: Dict, variant: str,
+                        encoding: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """ETag and Last-Modified of one representation of a workflow, from its indexed file_hash.
+    
+    Each content-coding of a file gets its own strong ETag, so ranges and
+    cached copies of different encodings are never mixed.
+    """
+    suffix = f"{variant}-{encoding}" if encoding else variant
+    return f'"{workflow_meta["file_hash"]}{suffix}"', http_date(workflow_meta.get("analyzed_at"))
+
+def encode_metadata(workflow_meta: Dict) -> bytes:
+    return json.dumps(workflow_meta, ensure_ascii=False).encode('utf-8')
+
+def splice_detail(metadata: bytes, file_path: Path) -> bytes:
+    """Build the detail envelope around the file's bytes without parsing them.
+    
+    The indexer only stores files that parsed as JSON, so the bytes can be
+    embedded as-is next to the (small) encoded metadata object.
+    """
+    return b'{"metadata":' + metadata + b',"raw_json":' + file_path.read_bytes().strip() + b'}'
 
 @app.get("/api/workflows/{filename}")
-async def get_workflow_detail(filename: str):
+async def get_workflow_detail(
+    filename: str,
+    request: Request,
+    raw: bool = Query(False, description="Return only the workflow file, unwrapped")
+):
     """Get detailed workflow information including raw JSON."""
     try:
         # Get workflow metadata from database
-        workflows, _ = db.search_workflows(f'filename:"{filename}"', limit=1)
-        if not workflows:
+        workflow_meta = await adb.get_workflow(filename)
+        if not workflow_meta:
             raise HTTPException(status_code=404, detail="Workflow not found in database")
         
-        workflow_meta = workflows[0]
+        if raw:
+            encoded = await adb.run_io(workflow_variant, request, workflow_meta)
+            etag, last_modified = workflow_validators(workflow_meta, "", encoded and encoded[1])
+            cached = not_modified(request, etag, last_modified, vary="Accept-Encoding")
+        else:
+            # The envelope embeds indexed metadata, which can change without the
+            # file (e.g. recategorization), so its tag covers the encoded metadata
+            # and no Last-Modified is sent (analyzed_at would not reflect that)
+            metadata = encode_metadata(workflow_meta)
+            etag, _ = workflow_validators(
+                workflow_meta, f"-detail-{INDEX_VERSION}-{hashlib.md5(metadata).hexdigest()[:12]}"
+            )
+            last_modified = None
+            cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
         
-        # file_path = Path(__file__).parent / "workflows" / workflow_meta.name / filename
-        # print(f"当前工作目录: {workflow_meta}")
-        # Load raw JSON from file
-        workflows_path = Path('workflows')
-        json_files = list(workflows_path.rglob("*.json"))
-        file_path = [f for f in json_files if f.name == filename][0]
-        if not file_path.exists():
-            print(f"Warning: File {file_path} not found on filesystem but exists in database")
+        file_path = await adb.get_workflow_path(filename)
+        if file_path is None:
+            print(f"Warning: File {filename} not found on filesystem but exists in database")
             raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found on filesystem")
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            raw_json = json.load(f)
+        headers = cache_headers(etag, last_modified)
+        if raw:
+            # Streamed straight from disk (precompressed when possible)
+            return workflow_file_response(file_path, encoded, headers)
         
-        return {
-            "metadata": workflow_meta,
-            "raw_json": raw_json
-        }
+        body = await adb.run_io(splice_detail, metadata, file_path)
+        return Response(content=body, media_type="application/json", headers=headers)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error loading workflow: {str(e)}")
 
 @app.get("/api/workflows/{filename}/download")
-async def download_workflow(filename: str):
+async def download_workflow(filename: str, request: Request):
     """Download workflow JSON file."""
     try:
-        workflows_path = Path('workflows')
-        json_files = list(workflows_path.rglob("*.json"))
-        file_path = [f for f in json_files if f.name == filename][0]
-        if not os.path.exists(file_path):
-            print(f"Warning: Download requested for missing file: {file_path}")
+        workflow_meta = await adb.get_workflow(filename)
+        if not workflow_meta:
+            raise HTTPException(status_code=404, detail="Workflow not found in database")
+        
+        encoded = await adb.run_io(workflow_variant, request, workflow_meta)
+        etag, last_modified = workflow_validators(workflow_meta, "", encoded and encoded[1])
+        cached = not_modified(request, etag, last_modified, vary="Accept-Encoding")
+        if cached:
+            return cached
+        
+        file_path = await adb.get_workflow_path(filename)
+        if file_path is None:
+            print(f"Warning: Download requested for missing file: {filename}")
             raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found on filesystem")
         
-        return FileResponse(
-            file_path,
-            media_type="application/json",
-            filename=filename
-        )
+        return workflow_file_response(file_path, encoded, cache_headers(etag, last_modified), filename=filename)
+    except HTTPException:
+        raise
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found")
     except Exception as e:
@@ -252,26 +759,29 @@ async def download_workflow(filename: str):
         raise HTTPException(status_code=500, detail=f"Error downloading workflow: {str(e)}")
 
 @app.get("/api/workflows/{filename}/diagram")
-async def get_workflow_diagram(filename: str):
+async def get_workflow_diagram(filename: str, request: Request, response: Response):
     """Get Mermaid diagram code for workflow visualization."""
     try:
-        workflows_path = Path('workflows')
-        json_files = list(workflows_path.rglob("*.json"))
-        file_path = [f for f in json_files if f.name == filename][0]
-        print(f'{file_path}')
-        if not file_path.exists():
-            print(f"Warning: Diagram requested for missing file: {file_path}")
-            raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found on filesystem")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Validators and cached diagram in one indexed lookup
+        cached_diagram = await adb.get_diagram(filename)
+        if not cached_diagram:
+            raise HTTPException(status_code=404, detail="Workflow not found in database")
         
-        nodes = data.get('nodes', [])
-        connections = data.get('connections', {})
+        etag, last_modified = workflow_validators(cached_diagram, f"-diagram-{DIAGRAM_VERSION}")
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
         
-        # Generate Mermaid diagram
-        diagram = generate_mermaid_diagram(nodes, connections)
+        diagram = cached_diagram['diagram']
+        cache_result('diagram', diagram is not None)
+        if diagram is None:
+            # First view of this content: render from the file and cache it
+            diagram = await adb.render_diagram(filename, cached_diagram['file_hash'])
+            if diagram is None:
+                print(f"Warning: Diagram requested for missing file: {filename}")
+                raise HTTPException(status_code=404, detail=f"Workflow file '{filename}' not found on filesystem")
         
+        response.headers.update(cache_headers(etag, last_modified))
         return {"diagram": diagram}
     except HTTPException:
         raise
@@ -284,148 +794,261 @@ async def get_workflow_diagram(filename: str):
         print(f"Error generating diagram for {filename}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating diagram: {str(e)}")
 
-def generate_mermaid_diagram(nodes: List[Dict], connections: Dict) -> str:
-    """Generate Mermaid.js flowchart code from workflow nodes and connections."""
-    if not nodes:
-        return "graph TD\n  EmptyWorkflow[No nodes found in workflow]"
-    
-    # Create mapping for node names to ensure valid mermaid IDs
-    mermaid_ids = {}
-    for i, node in enumerate(nodes):
-        node_id = f"node{i}"
-        node_name = node.get('name', f'Node {i}')
-        mermaid_ids[node_name] = node_id
-    
-    # Start building the mermaid diagram
-    mermaid_code = ["graph TD"]
-    
-    # Add nodes with styling
-    for node in nodes:
-        node_name = node.get('name', 'Unnamed')
-        node_id = mermaid_ids[node_name]
-        node_type = node.get('type', '').replace('n8n-nodes-base.', '')
-        
-        # Determine node style based on type
-        style = ""
-        if any(x in node_type.lower() for x in ['trigger', 'webhook', 'cron']):
-            style = "fill:#b3e0ff,stroke:#0066cc"  # Blue for triggers
-        elif any(x in node_type.lower() for x in ['if', 'switch']):
-            style = "fill:#ffffb3,stroke:#e6e600"  # Yellow for conditional nodes
-        elif any(x in node_type.lower() for x in ['function', 'code']):
-            style = "fill:#d9b3ff,stroke:#6600cc"  # Purple for code nodes
-        elif 'error' in node_type.lower():
-            style = "fill:#ffb3b3,stroke:#cc0000"  # Red for error handlers
-        else:
-            style = "fill:#d9d9d9,stroke:#666666"  # Gray for other nodes
-        
-        # Add node with label (escaping special characters)
-        clean_name = node_name.replace('"', "'")
-        clean_type = node_type.replace('"', "'")
-        label = f"{clean_name}<br>({clean_type})"
-        mermaid_code.append(f"  {node_id}[\"{label}\"]")
-        mermaid_code.append(f"  style {node_id} {style}")
-    
-    # Add connections between nodes
-    for source_name, source_connections in connections.items():
-        if source_name not in mermaid_ids:
-            continue
+@app.get("/api/workflows/{filename}/similar", response_model=SimilarResponse)
+async def get_similar_workflows(
+    filename: str,
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of similar workflows")
+):
+    """Get structurally similar workflows (shared node types and connections)."""
+    try:
+        workflows = await adb.find_similar_workflows(filename, limit=limit)
+        if workflows is None:
+            raise HTTPException(status_code=404, detail="Workflow not found in database")
         
-        if isinstance(source_connections, dict) and 'main' in source_connections:
-            main_connections = source_connections['main']
-            
-            for i, output_connections in enumerate(main_connections):
-                if not isinstance(output_connections, list):
-                    continue
-                    
-                for connection in output_connections:
-                    if not isinstance(connection, dict) or 'node' not in connection:
-                        continue
-                        
-                    target_name = connection['node']
-                    if target_name not in mermaid_ids:
-                        continue
-                        
-                    # Add arrow with output index if multiple outputs
-                    label = f" -->|{i}| " if len(main_connections) > 1 else " --> "
-                    mermaid_code.append(f"  {mermaid_ids[source_name]}{label}{mermaid_ids[target_name]}")
-    
-    # Format the final mermaid diagram code
-    return "\n".join(mermaid_code)
-
-@app.post("/api/reindex")
-async def reindex_workflows(background_tasks: BackgroundTasks, force: bool = False):
-    """Trigger workflow reindexing in the background."""
-    def run_indexing():
-        db.index_all_workflows(force_reindex=force)
-    
-    background_tasks.add_task(run_indexing)
-    return {"message": "Reindexing started in background"}
-
-@app.get("/api/integrations")
-async def get_integrations():
-    """Get list of all unique integrations."""
+        return SimilarResponse(
+            filename=filename,
+            workflows=[SimilarWorkflow(**workflow) for workflow in workflows],
+            total=len(workflows)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error finding similar workflows: {str(e)}")
+
+# Seconds between status polls of the event stream, and between keep-alives
+REINDEX_EVENT_INTERVAL = 0.5
+REINDEX_KEEPALIVE = 15
+
+reindex_job: Optional[asyncio.Future] = None
+
+async def current_index_status() -> Dict[str, Any]:
+    """Index job status, including a run this process has queued but not started."""
+    status = await adb.get_index_status()
+    if reindex_job is not None and not reindex_job.done() and status["state"] != "running":
+        status = {**status, "state": "queued"}
+    return status
+
+@app.post("/api/reindex", status_code=202)
+async def reindex_workflows(force: bool = False):
+    """Start reindexing on the low-priority indexing thread; a run already active (in any worker) is reused."""
+    global reindex_job
+    status = await current_index_status()
+    if status["state"] in ("running", "queued"):
+        return {"message": "Reindexing already in progress", "job": status}
+    
+    reindex_job = adb.run_in_background(db.index_all_workflows, force_reindex=force)
+    return {"message": "Reindexing started in background", "job": {**status, "state": "queued"}}
+
+@app.get("/api/reindex/status")
+async def get_reindex_status():
+    """Progress, throughput and ETA of the running index job, and the last run's result."""
+    return await current_index_status()
+
+@app.get("/api/reindex/events")
+async def reindex_events(request: Request):
+    """Server-sent events: the reindex status on every change, until no run is active."""
+    async def events():
+        last_progress = None
+        last_sent = time.monotonic()
+        while not await request.is_disconnected():
+            status = await current_index_status()
+            progress = (status["state"], status.get("phase"), status.get("done"), status.get("last_result"))
+            if progress != last_progress:
+                yield f"event: status\ndata: {json.dumps(status)}\n\n"
+                last_progress, last_sent = progress, time.monotonic()
+            elif time.monotonic() - last_sent >= REINDEX_KEEPALIVE:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            if status["state"] not in ("running", "queued"):
+                break
+            await asyncio.sleep(REINDEX_EVENT_INTERVAL)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Scrape-time metrics (request, DB and cache metrics are recorded as they happen)
+def index_age_seconds() -> Dict[Tuple, Optional[float]]:
+    generated = utc_epoch(db.get_index_generation()[1])
+    return {(): time.time() - generated if generated else None}
+
+# The index job status file is read once per scrape, for all the gauges below
+scrape_index_status = REGISTRY.once_per_scrape(db.get_index_status)
+
+def index_status_metric(name: str, documentation: str, value):
+    """Gauge read from the index job status; value(status) returns a number or None."""
+    CallbackGauge(name, documentation, lambda: {(): value(scrape_index_status())})
+
+CallbackGauge("workflow_index_generation", "Generation of the published index",
+              lambda: {(): db.get_index_generation()[0]})
+CallbackGauge("workflow_index_age_seconds", "Seconds since the index was last published", index_age_seconds)
+def indexed_workflows() -> Dict[Tuple, float]:
+    total = db.get_indexed_total()  # Scrapes only read; NaN until the stats row exists
+    return {(): float("nan") if total is None else total}
+
+CallbackGauge("workflow_indexed_workflows", "Workflows in the index", indexed_workflows)
+index_status_metric("workflow_indexer_running", "Whether an index run is in progress",
+                    lambda status: float(status["state"] == "running"))
+index_status_metric("workflow_indexer_progress_ratio", "Fraction of files processed by the running index run",
+                    lambda status: status["percent"] / 100 if "percent" in status else None)
+index_status_metric("workflow_indexer_throughput_files_per_second", "Files per second of the running index run",
+                    lambda status: status.get("throughput"))
+index_status_metric("workflow_indexer_eta_seconds", "Estimated seconds left in the running index run",
+                    lambda status: status.get("eta_seconds"))
+index_status_metric("workflow_indexer_last_duration_seconds", "Duration of the last finished index run",
+                    lambda status: (status.get("last_result") or {}).get("duration_seconds"))
+index_status_metric("workflow_indexer_last_processed_files", "Files (re)analyzed by the last finished index run",
+                    lambda status: (status.get("last_result") or {}).get("processed"))
+CallbackGauge("workflow_admission_active", "Requests holding a concurrency slot",
+              lambda: {(limit.name,): limit.active for _, _, limit in ROUTE_LIMITS}, ["limit"])
+CallbackGauge("workflow_admission_waiting", "Requests queued for a concurrency slot",
+              lambda: {(limit.name,): limit.waiting for _, _, limit in ROUTE_LIMITS}, ["limit"])
+CallbackCounter("workflow_admission_rejected_total", "Requests shed with 429 or 503",
+                lambda: {(limit.name,): limit.rejected for _, _, limit in ROUTE_LIMITS}, ["limit"])
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics of this worker process (labeled worker="N" under --workers)."""
+    body = await adb.run(REGISTRY.render)
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/integrations", response_model=IntegrationsResponse)
+async def get_integrations(
+    prefix: str = Query("", description="Case-insensitive integration name prefix"),
+    page: int = Query(1, ge=1, description="Page number"),
+    per_page: int = Query(100, ge=1, le=500, description="Items per page")
+):
+    """Get integrations with workflow counts, trigger mix and top co-occurring integrations."""
     try:
-        stats = db.get_stats()
-        # For now, return basic info. Could be enhanced to return detailed integration stats
-        return {"integrations": [], "count": stats['unique_integrations']}
+        integrations, total = await adb.get_integrations(
+            prefix=prefix,
+            limit=per_page,
+            offset=(page - 1) * per_page
+        )
+        return IntegrationsResponse(
+            integrations=integrations,
+            count=total,
+            page=page,
+            per_page=per_page,
+            pages=(total + per_page - 1) // per_page,
+            prefix=prefix
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching integrations: {str(e)}")
 
+PAIR_RANK_PATTERN = "^(count|lift|pmi)$"
+
+@app.get("/api/integrations/pairs", response_model=IntegrationPairsResponse)
+async def get_integration_pairs(
+    rank: str = Query("count", pattern=PAIR_RANK_PATTERN, description="Rank pairs by count, lift or pmi"),
+    min_count: int = Query(2, ge=1, description="Ignore pairs seen in fewer workflows"),
+    limit: int = Query(20, ge=1, le=500, description="Maximum number of pairs")
+):
+    """Get the most common (or most strongly associated) integration pairs."""
+    try:
+        pairs = await adb.get_integration_pairs(rank=rank, min_count=min_count, limit=limit)
+        return IntegrationPairsResponse(pairs=pairs, rank=rank, min_count=min_count)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching integration pairs: {str(e)}")
+
+@app.get("/api/integrations/{integration:path}/related", response_model=IntegrationPairsResponse)
+async def get_related_integrations(
+    integration: str,
+    rank: str = Query("count", pattern=PAIR_RANK_PATTERN, description="Rank by count, lift or pmi"),
+    min_count: int = Query(2, ge=1, description="Ignore pairs seen in fewer workflows"),
+    limit: int = Query(20, ge=1, le=500, description="Maximum number of integrations")
+):
+    """Get integrations that co-occur with the given integration."""
+    try:
+        pairs = await adb.get_integration_pairs(integration, rank=rank, min_count=min_count, limit=limit)
+        return IntegrationPairsResponse(pairs=pairs, rank=rank, min_count=min_count)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching related integrations: {str(e)}")
+
+def load_category_mappings() -> Dict[str, str]:
+    """Load the filename -> category mapping from search_categories.json."""
+    search_categories_file = Path("context/search_categories.json")
+    if not search_categories_file.exists():
+        return {}
+    
+    mappings = {}
+    for item in load_json_file(search_categories_file):
+        filename = item.get('filename')
+        category = item.get('category') or 'Uncategorized'
+        if filename:
+            mappings[filename] = category
+    return mappings
+
+CATEGORY_CONTEXT_FILES = (Path("context/search_categories.json"),)
+
+class ContextResponseCache:
+    """Pre-serialized JSON body built from the context/ files, rebuilt when one of them changes."""
+    
+    def __init__(self, key: str, build):
+        self.key = key
+        self.build = build
+        self._entry = None  # (file versions, body, gzip body, digest, mtime)
+    
+    def get(self) -> Tuple[bytes, Optional[bytes], str, float]:
+        """Return (body, gzip body, content digest, latest file mtime); only stats the files when cached."""
+        versions = tuple(
+            (path.stat().st_mtime_ns, path.stat().st_size) if path.exists() else None
+            for path in CATEGORY_CONTEXT_FILES
+        )
+        entry = self._entry
+        cache_result('context', entry is not None and entry[0] == versions)
+        if entry is None or entry[0] != versions:
+            body = json.dumps({self.key: self.build()}, ensure_ascii=False).encode('utf-8')
+            mtime = max((version[0] / 1e9 for version in versions if version), default=0)
+            gzip_body = compress(body, 'gzip') if len(body) >= MINIMUM_SIZE else None
+            entry = (versions, body, gzip_body, hashlib.md5(body).hexdigest()[:16], mtime)
+            self._entry = entry
+        return entry[1:]
+
+category_mappings_cache = ContextResponseCache("mappings", load_category_mappings)
+
+async def cached_context_response(request: Request, cache: ContextResponseCache) -> Response:
+    """Serve a cached context body, tagged with the index generation and its content digest."""
+    body, gzip_body, digest, mtime = await adb.run_io(cache.get)
+    generation, generated_at = await adb.get_index_generation()
+    etag = f'"{cache.key}-{generation}-{digest}"'
+    latest = max(utc_epoch(generated_at) or 0, mtime)
+    last_modified = email.utils.formatdate(latest, usegmt=True) if latest else None
+    cached = not_modified(request, etag, last_modified)
+    if cached:
+        return cached
+    headers = cache_headers(etag, last_modified)
+    if gzip_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if 'gzip' in accepted_encodings(request.headers.get("accept-encoding", "")):
+            headers["Content-Encoding"] = "gzip"
+            body = gzip_body
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api/categories")
-async def get_categories():
-    """Get available workflow categories for filtering."""
+async def get_categories(request: Request, response: Response):
+    """Get available workflow categories for filtering (from the indexed category column)."""
     try:
-        # Try to load from the generated unique categories file
-        categories_file = Path("context/unique_categories.json")
-        if categories_file.exists():
-            with open(categories_file, 'r', encoding='utf-8') as f:
-                categories = json.load(f)
-            return {"categories": categories}
-        else:
-            # Fallback: extract categories from search_categories.json
-            search_categories_file = Path("context/search_categories.json")
-            if search_categories_file.exists():
-                with open(search_categories_file, 'r', encoding='utf-8') as f:
-                    search_data = json.load(f)
-                
-                unique_categories = set()
-                for item in search_data:
-                    if item.get('category'):
-                        unique_categories.add(item['category'])
-                    else:
-                        unique_categories.add('Uncategorized')
-                
-                categories = sorted(list(unique_categories))
-                return {"categories": categories}
-            else:
-                # Last resort: return basic categories
-                return {"categories": ["Uncategorized"]}
-                
+        generation, generated_at = await adb.get_index_generation()
+        etag, last_modified = f'"categories-{generation}"', http_date(generated_at)
+        cached = not_modified(request, etag, last_modified)
+        if cached:
+            return cached
+        
+        categories = await adb.get_categories()
+        response.headers.update(cache_headers(etag, last_modified))
+        return {"categories": categories}
     except Exception as e:
         print(f"Error loading categories: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching categories: {str(e)}")
 
 @app.get("/api/category-mappings")
-async def get_category_mappings():
-    """Get filename to category mappings for client-side filtering."""
+async def get_category_mappings(request: Request):
+    """Get filename to category mappings (legacy; use /api/workflows?category= instead)."""
     try:
-        search_categories_file = Path("context/search_categories.json")
-        if not search_categories_file.exists():
-            return {"mappings": {}}
-        
-        with open(search_categories_file, 'r', encoding='utf-8') as f:
-            search_data = json.load(f)
-        
-        # Convert to a simple filename -> category mapping
-        mappings = {}
-        for item in search_data:
-            filename = item.get('filename')
-            category = item.get('category') or 'Uncategorized'
-            if filename:
-                mappings[filename] = category
-        
-        return {"mappings": mappings}
-        
+        return await cached_context_response(request, category_mappings_cache)
     except Exception as e:
         print(f"Error loading category mappings: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching category mappings: {str(e)}")
@@ -440,46 +1063,19 @@ async def search_workflows_by_category(
     try:
         offset = (page - 1) * per_page
         
-        workflows, total = db.search_by_category(
+        rows, total = await adb.search_by_category(
             category=category,
             limit=per_page,
-            offset=offset
+            offset=offset,
+            raw_rows=True
         )
         
-        # Convert to Pydantic models with error handling
-        workflow_summaries = []
-        for workflow in workflows:
-            try:
-                clean_workflow = {
-                    'id': workflow.get('id'),
-                    'filename': workflow.get('filename', ''),
-                    'name': workflow.get('name', ''),
-                    'active': workflow.get('active', False),
-                    'description': workflow.get('description', ''),
-                    'trigger_type': workflow.get('trigger_type', 'Manual'),
-                    'complexity': workflow.get('complexity', 'low'),
-                    'node_count': workflow.get('node_count', 0),
-                    'integrations': workflow.get('integrations', []),
-                    'tags': workflow.get('tags', []),
-                    'created_at': workflow.get('created_at'),
-                    'updated_at': workflow.get('updated_at')
-                }
-                workflow_summaries.append(WorkflowSummary(**clean_workflow))
-            except Exception as e:
-                print(f"Error converting workflow {workflow.get('filename', 'unknown')}: {e}")
-                continue
-        
-        pages = (total + per_page - 1) // per_page
-        
-        return SearchResponse(
-            workflows=workflow_summaries,
-            total=total,
-            page=page,
-            per_page=per_page,
-            pages=pages,
+        body = await adb.run(
+            encode_search_response, rows, total, page, per_page,
             query=f"category:{category}",
             filters={"category": category}
         )
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching by category: {str(e)}")
 
@@ -494,7 +1090,7 @@ async def global_exception_handler(request, exc):
 # Mount static files AFTER all routes are defined
 static_dir = Path("static")
 if static_dir.exists():
-    app.mount("/static", StaticFiles(directory="static"), name="static")
+    app.mount("/static", static_files, name="static")
     print(f"✅ Static files mounted from {static_dir.absolute()}")
 else:
     print(f"❌ Warning: Static directory not found at {static_dir.absolute()}")
@@ -505,8 +1101,112 @@ def create_static_directory():
     static_dir.mkdir(exist_ok=True)
     return static_dir
 
-def run_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False):
-    """Run the FastAPI server."""
+def warm_caches():
+    """Load what every worker needs before forking, so forked workers share it."""
+    db.get_stats()
+    db.get_vector_index()
+    paths = db.warm_path_cache()
+    static_variants.prepare("static")
+    category_mappings_cache.get()
+    # Forked children must not inherit an open SQLite connection
+    db.close_read_connection()
+    print(f"✅ Caches warm: {paths} workflow paths")
+
+# Crashed workers are replaced after an exponentially growing delay; a worker
+# that exits within WORKER_MIN_UPTIME seconds counts as a rapid failure, and
+# after WORKER_MAX_RAPID_FAILURES in a row the server gives up
+WORKER_RESPAWN_DELAY = 0.5
+WORKER_RESPAWN_MAX_DELAY = 30.0
+WORKER_MIN_UPTIME = 10.0
+WORKER_MAX_RAPID_FAILURES = 5
+
+def serve_workers(host: str, port: int, workers: int, access_log: bool = True):
+    """Bind once, warm caches, then fork workers that share the socket.
+    
+    Everything loaded before the fork (modules, vector index mapping, path
+    cache, static digests) is shared copy-on-write; gc.freeze() keeps the
+    collector from touching, and so copying, those pages. Each worker opens
+    its own read-only SQLite connections. Crashed workers are replaced with
+    backoff (see WORKER_RESPAWN_DELAY). Without os.fork (Windows), falls
+    back to uvicorn's own (spawned, unshared) workers.
+    """
+    if not hasattr(os, "fork"):
+        os.environ[METRICS_WORKER_ENV] = "pid"  # Spawned workers label their metrics by pid
+        uvicorn.run("api_server:app", host=host, port=port, workers=workers,
+                    access_log=access_log, log_level="info")
+        return
+    
+    config = uvicorn.Config(app, host=host, port=port, access_log=access_log, log_level="info")
+    sock = config.bind_socket()
+    warm_caches()
+    gc.freeze()
+    
+    children = {}  # pid -> (worker slot, start time)
+    stopping = False
+    
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            # A replacement keeps the slot's label, so Prometheus sees a counter reset
+            REGISTRY.set_worker(str(slot))
+            status = 1
+            try:
+                uvicorn.Server(config).run(sockets=[sock])
+                status = 0
+            finally:
+                os._exit(status)
+        children[pid] = (slot, time.monotonic())
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        # Ctrl+C already reaches the whole process group; forward only SIGTERM
+        if signum == signal.SIGTERM:
+            for pid in children:
+                os.kill(pid, signal.SIGTERM)
+    
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for slot in range(workers):
+        spawn(slot)
+    print(f"✅ Started {workers} workers on http://{host}:{port}")
+    
+    rapid_failures = 0
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        if pid not in children:
+            continue
+        slot, started = children.pop(pid)
+        if stopping:
+            continue
+        if time.monotonic() - started < WORKER_MIN_UPTIME:
+            rapid_failures += 1
+        else:
+            rapid_failures = 0
+        if rapid_failures >= WORKER_MAX_RAPID_FAILURES:
+            print(f"❌ Workers keep exiting right after start ({rapid_failures} in a row); shutting down")
+            stopping = True
+            for child in children:
+                os.kill(child, signal.SIGTERM)
+            continue
+        delay = min(WORKER_RESPAWN_DELAY * 2 ** max(rapid_failures - 1, 0), WORKER_RESPAWN_MAX_DELAY)
+        print(f"⚠️  Worker {pid} exited; starting a replacement in {delay:.1f}s")
+        deadline = time.monotonic() + delay
+        while not stopping and time.monotonic() < deadline:
+            time.sleep(min(0.1, deadline - time.monotonic()))
+        if not stopping:
+            spawn(slot)
+    sock.close()
+    if rapid_failures >= WORKER_MAX_RAPID_FAILURES:
+        raise SystemExit(1)
+
+def run_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False, workers: int = 1):
+    """Run the FastAPI server (workers > 1: pre-forked worker processes, see serve_workers)."""
     # Ensure static directory exists
     create_static_directory()
     
@@ -542,6 +1242,10 @@ def run_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False):
     print(f"🌐 Server will be available at: http://{host}:{port}")
     print(f"📁 Static files at: http://{host}:{port}/static/")
     
+    if workers > 1 and not reload:
+        serve_workers(host, port, workers)
+        return
+    
     uvicorn.run(
         "api_server:app",
         host=host,
@@ -558,7 +1262,14 @@ if __name__ == "__main__":
     parser.add_argument('--host', default='127.0.0.1', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8000, help='Port to bind to')
     parser.add_argument('--reload', action='store_true', help='Enable auto-reload for development')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes (forked after warming caches)')
+    parser.add_argument('--server-timing', action='store_true',
+                        help='Send Server-Timing headers and log sampled per-request timings')
+    parser.add_argument('--timing-log-sample', type=float, default=None,
+                        help='Fraction of requests logged with --server-timing (default: 0.01)')
     
     args = parser.parse_args()
+    if args.server_timing:
+        configure_timing(True, log_sample=args.timing_log_sample)
     
-    run_server(host=args.host, port=args.port, reload=args.reload)
\ No newline at end of file
+    run_server(host=args.host, port=args.port, reload=args.reload, workers=args.workers)
\ No newline at end of file
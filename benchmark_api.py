@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+API Concurrency Benchmark
+Starts the API on a local port and fires cheap requests (/api/stats) while
+heavy ones (large workflow detail, semantic search) are in flight, then
+reports latency percentiles. Run with --inline to execute database calls on
+the event loop for comparison, --reindex to run a forced reindex during the
+load, or --serialization to time encoding one 100-row search page with
+Pydantic models versus the direct row encoder.
+
+Usage: WORKFLOW_DB_PATH=workflows.db python benchmark_api.py [--requests 200] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+try:
+    import httpx
+except ImportError:
+    print("❌ httpx is required for the benchmark: pip install httpx")
+    sys.exit(1)
+
+import uvicorn
+
+import api_server
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def largest_workflow() -> str:
+    conn = api_server.db.connect()
+    row = conn.execute("SELECT filename FROM workflows ORDER BY file_size DESC LIMIT 1").fetchone()
+    conn.close()
+    return row['filename'] if row else ''
+
+
+def benchmark_serialization(rounds: int = 50, per_page: int = 100):
+    """Time encoding a search page: per-row Pydantic models vs. direct row encoding."""
+    rows, total = api_server.db.search_workflows(limit=per_page, raw_rows=True)
+    filters = {"trigger": "all", "complexity": "all", "category": "all"}
+
+    def pydantic_page() -> bytes:
+        # What the response_model path did: row dicts, models, re-validation, JSON dump
+        workflows = [api_server.db.row_to_workflow(row) for row in rows]
+        summaries = [
+            api_server.WorkflowSummary(**{field: workflow.get(field) for field in api_server.WorkflowSummary.model_fields})
+            for workflow in workflows
+        ]
+        response = api_server.SearchResponse(
+            workflows=summaries, total=total, page=1, per_page=per_page,
+            pages=(total + per_page - 1) // per_page, query="", filters=filters
+        )
+        response = api_server.SearchResponse.model_validate(response.model_dump())
+        return json.dumps(response.model_dump(mode="json"), ensure_ascii=False).encode("utf-8")
+
+    def direct_page() -> bytes:
+        return api_server.encode_search_response(rows, total, 1, per_page, query="", filters=filters)
+
+    assert json.loads(pydantic_page()) == json.loads(direct_page())
+    print(f"📈 Serializing one {len(rows)}-row search page ({rounds} rounds):")
+    for name, encode in (("pydantic", pydantic_page), ("direct", direct_page)):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            encode()
+        print(f"  {name:<9} {(time.perf_counter() - started) / rounds * 1000:7.2f}ms per page")
+
+
+def start_server() -> str:
+    """Serve the app from a background thread and return its base URL."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(api_server.app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f'http://127.0.0.1:{port}'
+
+
+async def run_benchmark(base_url: str, total: int, concurrency: int,
+                        reindex: bool = False) -> Tuple[Dict[str, List[float]], Counter]:
+    heavy_file = largest_workflow()
+    if not heavy_file:
+        print("No workflows indexed; run workflow_db.py --index first.")
+        sys.exit(1)
+
+    routes = {
+        'light': '/api/stats',
+        'detail': f'/api/workflows/{heavy_file}',
+        'semantic': '/api/workflows?q=send+slack+message+on+new+email&mode=semantic&per_page=100',
+    }
+    mix = ['light', 'light', 'detail', 'semantic']
+    timings = {name: [] for name in routes}
+    statuses = Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def fire(name: str):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(routes[name])
+                timings[name].append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] += 1
+                if response.status_code not in (429, 503):  # Shed by admission control
+                    response.raise_for_status()
+
+        # Warm caches (vector index mmap, per-thread connections)
+        for name in routes:
+            await fire(name)
+        for samples in timings.values():
+            samples.clear()
+        statuses.clear()
+
+        if reindex:
+            (await client.post('/api/reindex', params={'force': 'true'})).raise_for_status()
+        await asyncio.gather(*(fire(mix[i % len(mix)]) for i in range(total)))
+    return timings, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API latency under parallel load')
+    parser.add_argument('--requests', type=int, default=200, help='Total requests to fire')
+    parser.add_argument('--concurrency', type=int, default=32, help='Requests in flight at once')
+    parser.add_argument('--inline', action='store_true', help='Run DB calls on the event loop (baseline)')
+    parser.add_argument('--reindex', action='store_true', help='Run a forced reindex during the load')
+    parser.add_argument('--serialization', action='store_true',
+                        help='Benchmark search page serialization instead of the load test')
+    args = parser.parse_args()
+
+    if args.serialization:
+        benchmark_serialization()
+        return
+
+    if args.inline:
+        async def run_inline(func, *func_args, **kwargs):
+            return func(*func_args, **kwargs)
+        api_server.adb.run = api_server.adb.run_io = run_inline
+
+    started = time.perf_counter()
+    base_url = start_server()
+    timings, statuses = asyncio.run(run_benchmark(base_url, args.requests, args.concurrency, args.reindex))
+    elapsed = time.perf_counter() - started
+
+    mode = 'inline (event loop)' if args.inline else f'thread pool ({api_server.adb.max_workers} workers)'
+    if args.reindex:
+        mode += ', during reindex'
+    print(f"📈 {args.requests} requests, concurrency {args.concurrency}, {mode}: {elapsed:.2f}s")
+    for name, samples in timings.items():
+        if samples:
+            print(f"  {name:<9} n={len(samples):<4} p50={percentile(samples, 50):7.1f}ms  "
+                  f"p99={percentile(samples, 99):7.1f}ms")
+    shed = statuses[429] + statuses[503]
+    if shed:
+        print(f"  shed      {shed} requests (429: {statuses[429]}, 503: {statuses[503]})")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,46 @@ Quick Dashboard - View Workflow Analysis Statistics
 """
 
 import json
+import os
+import sqlite3
+from itertools import combinations
 from pathlib import Path
 from collections import defaultdict
 
+
+PAIR_ORDER = {
+    'count': "count DESC, lift DESC",
+    'lift': "lift DESC, count DESC",
+    'pmi': "pmi DESC, count DESC",
+}
+
+def load_indexed_pairs(rank: str = 'count', min_count: int = 2, limit: int = 10):
+    """Load integration pairs precomputed by the indexer, or None if no index exists.
+    
+    Opens the database read-only, so the dashboard never migrates it or waits
+    for a running reindex.
+    """
+    db_path = os.environ.get('WORKFLOW_DB_PATH', 'workflows.db')
+    if not Path(db_path).exists():
+        return None
+    
+    try:
+        conn = sqlite3.connect(f"{Path(db_path).absolute().as_uri()}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(f"""
+                SELECT integration, other, count, lift, pmi
+                FROM integration_pairs
+                WHERE integration < other AND count >= ?
+                ORDER BY {PAIR_ORDER[rank]}, integration, other
+                LIMIT ?
+            """, (min_count, limit)).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return [dict(row) for row in rows] or None
+
 def display_dashboard():
     """Display analysis dashboard."""
     
@@ -77,18 +114,29 @@ def display_dashboard():
     # Most Used Integration Pairs
     print(f"\n🔗 MOST COMMON INTEGRATION PAIRS")
     print("-" * 80)
-    pair_counts = defaultdict(int)
-    for cat, wfs in workflows.items():
-        for wf in wfs:
-            integ_list = sorted(wf['integrations'])
-            if len(integ_list) >= 2:
-                for i in range(len(integ_list) - 1):
-                    pair = f"{integ_list[i]} + {integ_list[i+1]}"
-                    pair_counts[pair] += 1
-    
-    sorted_pairs = sorted(pair_counts.items(), key=lambda x: x[1], reverse=True)
-    for i, (pair, count) in enumerate(sorted_pairs[:10], 1):
-        print(f"  {i:2d}. {pair:.<50} {count:>3} occurrences")
+    indexed_pairs = load_indexed_pairs()
+    if indexed_pairs:
+        # Full co-occurrence matrix (AᵀA) computed by the indexer
+        for i, pair in enumerate(indexed_pairs, 1):
+            label = f"{pair['integration']} + {pair['other']}"
+            print(f"  {i:2d}. {label:.<50} {pair['count']:>3} occurrences (lift {pair['lift']:.1f})")
+        
+        print(f"\n🧲 STRONGEST INTEGRATION ASSOCIATIONS (PMI, ≥5 workflows)")
+        print("-" * 80)
+        for i, pair in enumerate(load_indexed_pairs(rank='pmi', min_count=5) or [], 1):
+            label = f"{pair['integration']} + {pair['other']}"
+            print(f"  {i:2d}. {label:.<50} PMI {pair['pmi']:>5.2f} ({pair['count']} workflows)")
+    else:
+        # No index available: count every pair in each workflow
+        pair_counts = defaultdict(int)
+        for cat, wfs in workflows.items():
+            for wf in wfs:
+                for first, second in combinations(sorted(set(wf['integrations'])), 2):
+                    pair_counts[f"{first} + {second}"] += 1
+        
+        sorted_pairs = sorted(pair_counts.items(), key=lambda x: x[1], reverse=True)
+        for i, (pair, count) in enumerate(sorted_pairs[:10], 1):
+            print(f"  {i:2d}. {pair:.<50} {count:>3} occurrences")
     
     # Trigger Type Distribution
     print(f"\n⚡ TRIGGER TYPE DISTRIBUTION")
@@ -35,6 +35,11 @@ def check_requirements() -> bool:
     except ImportError:
         missing_deps.append("fastapi")
     
+    try:
+        import numpy
+    except ImportError:
+        missing_deps.append("numpy")
+    
     if missing_deps:
         print(f"❌ Missing dependencies: {', '.join(missing_deps)}")
         print("💡 Install with: pip install -r requirements.txt")
@@ -79,7 +84,7 @@ def setup_database(force_reindex: bool = False) -> str:
     return db_path
 
 
-def start_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False):
+def start_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False, workers: int = 1):
     """Start the FastAPI server."""
     print(f"🌐 Starting server at http://{host}:{port}")
     print(f"📊 API Documentation: http://{host}:{port}/docs")
@@ -91,6 +96,12 @@ def start_server(host: str = "127.0.0.1", port: int = 8000, reload: bool = False
     # Configure database path
     os.environ['WORKFLOW_DB_PATH'] = "database/workflows.db"
     
+    if workers > 1 and not reload:
+        # Import (and warm) the app once, then fork workers that share it
+        import api_server
+        api_server.serve_workers(host, port, workers, access_log=False)
+        return
+    
     # Start uvicorn with better configuration
     import uvicorn
     uvicorn.run(
@@ -116,6 +127,8 @@ Examples:
   python run.py --host 0.0.0.0     # Accept external connections
   python run.py --reindex          # Force database reindexing
   python run.py --dev              # Development mode with auto-reload
+  python run.py --workers 4        # One worker process per vCPU
+  python run.py --server-timing    # Per-request timing headers and logs
         """
     )
     
@@ -140,9 +153,24 @@ Examples:
         action="store_true", 
         help="Development mode with auto-reload"
     )
+    parser.add_argument(
+        "--workers", 
+        type=int, 
+        default=1, 
+        help="Worker processes, forked after the database and caches are loaded (default: 1)"
+    )
+    parser.add_argument(
+        "--server-timing", 
+        action="store_true", 
+        help="Send Server-Timing headers and log sampled per-request timings"
+    )
     
     args = parser.parse_args()
     
+    if args.server_timing:
+        # Read by api_server when it is imported (also by reloaded servers)
+        os.environ['WORKFLOW_SERVER_TIMING'] = '1'
+    
     print_banner()
     
     # Check dependencies
@@ -164,7 +192,8 @@ Examples:
         start_server(
             host=args.host, 
             port=args.port, 
-            reload=args.dev
+            reload=args.dev,
+            workers=args.workers
         )
     except KeyboardInterrupt:
         print("\n👋 Server stopped!")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Regression check: sorted browse queries must walk their covering indexes (workflow_db.py --explain-sorts)"""
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+
+
+def explain_sorts(db_path):
+    env = {**os.environ, 'WORKFLOW_DB_PATH': str(db_path), 'PYTHONIOENCODING': 'utf-8'}
+    return subprocess.run(
+        [sys.executable, 'workflow_db.py', '--explain-sorts'],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True
+    )
+
+
+def test_sort_plans_use_covering_indexes(tmp_path):
+    result = explain_sorts(tmp_path / 'workflows.db')
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert '❌' not in result.stdout
+    assert result.stdout.count('✅') > 0
+
+
+def test_non_covering_sort_index_fails(tmp_path):
+    db_path = tmp_path / 'workflows.db'
+    assert explain_sorts(db_path).returncode == 0  # Creates the schema
+
+    # Replace one sort index with one lacking the filter columns
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX idx_sort_name")
+    conn.execute("CREATE INDEX idx_sort_name ON workflows(name, id)")
+    conn.commit()
+    conn.close()
+
+    result = explain_sorts(db_path)
+    assert result.returncode == 1
+    assert '❌ sort=name' in result.stdout
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Admission Control for Expensive Endpoints
+Per-route concurrency limits with a bounded wait queue. Requests beyond the
+limit wait for a slot; when the queue is full they are shed with 429, and
+when no slot frees up in time with 503, so a burst of heavy requests cannot
+pile up behind the database thread pool and starve cheap ones.
+"""
+
+import asyncio
+import json
+import math
+import re
+from collections import deque
+from typing import Deque, List, Optional, Pattern, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from workflow_timing import phase
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimit:
+    """At most `limit` requests in flight and `queue` waiting, each for up to `timeout` seconds.
+
+    A finished request hands its slot straight to the oldest waiter, so
+    waiters are admitted in arrival order.
+    """
+
+    def __init__(self, name: str, limit: int, queue: int, timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.active = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.queue:
+            self.rejected += 1
+            raise Overloaded(429, f"Too many concurrent {self.name} requests", 1)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.rejected += 1
+            raise Overloaded(503, f"Timed out waiting for a {self.name} slot",
+                             max(1, math.ceil(self.timeout)))
+        except asyncio.CancelledError:
+            self._abandon(waiter)  # Client went away while queued
+            raise
+
+    def _abandon(self, waiter: asyncio.Future):
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+        elif waiter.done() and not waiter.cancelled():
+            self.release()  # The slot arrived just as we gave up: pass it on
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # Slot handed over; active count unchanged
+                return
+        self.active -= 1
+
+
+class AdmissionControlMiddleware:
+    """Apply the first ConcurrencyLimit whose (method, path pattern) matches a request.
+
+    The slot is held until the response has been sent in full, so streamed
+    responses (exports, archives) count for as long as they stream.
+    """
+
+    def __init__(self, app: ASGIApp, limits: List[Tuple[str, Pattern, ConcurrencyLimit]]):
+        self.app = app
+        self.limits = limits
+
+    def match(self, method: str, path: str) -> Optional[ConcurrencyLimit]:
+        for limit_method, pattern, limit in self.limits:
+            if method == limit_method and pattern.match(path):
+                return limit
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        limit = self.match(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            with phase("queue"):
+                await limit.acquire()
+        except Overloaded as e:
+            body = json.dumps({"detail": e.detail}).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": e.status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"retry-after", str(e.retry_after).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
+
+
+def route_limit(method: str, path_pattern: str, limit: ConcurrencyLimit) -> Tuple[str, Pattern, ConcurrencyLimit]:
+    """Table entry for AdmissionControlMiddleware (path_pattern must match the whole path)."""
+    return method, re.compile(f"^{path_pattern}$"), limit
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Streaming ZIP Archives of Workflow Files
+The archive layout (every header offset and the total size) is computed up
+front from file sizes alone, so an archive can be streamed in constant memory
+and any byte range of it can be produced on demand for resumable downloads.
+Entries whose gzip variant has been precompressed reuse its deflate stream and
+CRC as-is; the rest are stored uncompressed.
+"""
+
+import hashlib
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+STORED, DEFLATED = 0, 8
+FLAG_UTF8 = 0x800
+VERSION_NEEDED = 20
+
+# Without ZIP64 records, sizes/offsets are 32-bit and the entry count 16-bit
+ZIP32_LIMIT = 0xFFFFFFFF
+MAX_ENTRIES = 0xFFFF
+
+LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+CENTRAL_HEADER = struct.Struct('<IHHHHHHIIIHHHHHII')
+END_RECORD = struct.Struct('<IHHHHIIH')
+
+GZIP_HEADER_SIZE = 10
+GZIP_TRAILER_SIZE = 8
+
+
+def dos_datetime(mtime: float) -> Tuple[int, int]:
+    """(time, date) fields in MS-DOS format, clamped to the 1980 epoch."""
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), \
+        ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class ArchiveMember:
+    """One archive entry: its name, where its (possibly compressed) data lives, and sizes."""
+
+    def __init__(self, name: str, source: Path, data_offset: int, compressed_size: int,
+                 size: int, method: int, crc: Optional[int], mtime: float):
+        self.name = name
+        self.encoded_name = name.encode('utf-8')
+        self.source = source
+        self.data_offset = data_offset
+        self.compressed_size = compressed_size
+        self.size = size
+        self.method = method
+        self._crc = crc
+        self.mtime = mtime
+        self.header_offset = 0
+
+    @classmethod
+    def stored(cls, name: str, path: Path, size: int, mtime: float) -> 'ArchiveMember':
+        return cls(name, path, 0, size, size, STORED, None, mtime)
+
+    @classmethod
+    def from_gzip(cls, name: str, variant: Path, mtime: float) -> Optional['ArchiveMember']:
+        """Entry reusing a gzip file's raw deflate stream, or None if its header has extras."""
+        with open(variant, 'rb') as f:
+            header = f.read(GZIP_HEADER_SIZE)
+            f.seek(-GZIP_TRAILER_SIZE, 2)
+            crc, size = struct.unpack('<II', f.read(GZIP_TRAILER_SIZE))
+            variant_size = f.tell()
+        # Magic, deflate, and no optional fields (name, comment, ...) before the stream
+        if len(header) < GZIP_HEADER_SIZE or header[:3] != b'\x1f\x8b\x08' or header[3] != 0:
+            return None
+        compressed_size = variant_size - GZIP_HEADER_SIZE - GZIP_TRAILER_SIZE
+        return cls(name, variant, GZIP_HEADER_SIZE, compressed_size, size, DEFLATED, crc, mtime)
+
+    @property
+    def crc(self) -> int:
+        """CRC-32 of the uncompressed data (read from the source for stored entries)."""
+        if self._crc is None:
+            crc = 0
+            for chunk in self.read(0, self.compressed_size):
+                crc = zlib.crc32(chunk, crc)
+            self._crc = crc
+        return self._crc
+
+    def read(self, start: int, end: int) -> Iterator[bytes]:
+        """Yield bytes [start, end) of the entry data, CHUNK_SIZE at a time."""
+        with open(self.source, 'rb') as f:
+            f.seek(self.data_offset + start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise OSError(f"{self.source} changed while being archived")
+                remaining -= len(chunk)
+                yield chunk
+
+    def local_header(self) -> bytes:
+        dos_time, dos_date = dos_datetime(self.mtime)
+        return LOCAL_HEADER.pack(
+            0x04034b50, VERSION_NEEDED, FLAG_UTF8, self.method, dos_time, dos_date,
+            self.crc, self.compressed_size, self.size, len(self.encoded_name), 0
+        ) + self.encoded_name
+
+    def central_header(self) -> bytes:
+        dos_time, dos_date = dos_datetime(self.mtime)
+        return CENTRAL_HEADER.pack(
+            0x02014b50, VERSION_NEEDED, VERSION_NEEDED, FLAG_UTF8, self.method, dos_time, dos_date,
+            self.crc, self.compressed_size, self.size, len(self.encoded_name), 0, 0, 0, 0,
+            0o100644 << 16, self.header_offset
+        ) + self.encoded_name
+
+
+class ZipArchive:
+    """Byte layout of a ZIP archive whose entries are produced lazily."""
+
+    def __init__(self, members: List[ArchiveMember]):
+        if len(members) > MAX_ENTRIES:
+            raise ValueError(f"Too many files for one archive ({len(members)} > {MAX_ENTRIES})")
+        self.members = members
+
+        offset = 0
+        for member in members:
+            member.header_offset = offset
+            offset += LOCAL_HEADER.size + len(member.encoded_name) + member.compressed_size
+        self.central_offset = offset
+        self.central_size = sum(CENTRAL_HEADER.size + len(member.encoded_name) for member in members)
+        self.size = self.central_offset + self.central_size + END_RECORD.size
+        if self.size > ZIP32_LIMIT:
+            raise ValueError(f"Archive too large ({self.size} bytes); select fewer files")
+
+        # Changes whenever the bytes would (variant paths are content digests)
+        fingerprint = hashlib.md5()
+        for member in members:
+            fingerprint.update(f"{member.name}\0{member.source}\0{member.compressed_size}\0"
+                               f"{member.size}\0{member.mtime}\n".encode('utf-8'))
+        self.fingerprint = fingerprint.hexdigest()
+
+    def pieces(self) -> Iterator[Tuple[int, Callable[[int, int], Iterator[bytes]]]]:
+        """(length, produce) for each consecutive region; produce(start, end) yields its bytes."""
+        def header(build: Callable[[], bytes]) -> Callable[[int, int], Iterator[bytes]]:
+            return lambda start, end: iter((build()[start:end],))
+
+        for member in self.members:
+            yield LOCAL_HEADER.size + len(member.encoded_name), header(member.local_header)
+            yield member.compressed_size, member.read
+        for member in self.members:
+            yield CENTRAL_HEADER.size + len(member.encoded_name), header(member.central_header)
+        yield END_RECORD.size, header(lambda: END_RECORD.pack(
+            0x06054b50, 0, 0, len(self.members), len(self.members),
+            self.central_size, self.central_offset, 0
+        ))
+
+    def iter_bytes(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield archive bytes [start, end), coalesced into chunks of about CHUNK_SIZE."""
+        end = self.size if end is None else end
+        buffer = bytearray()
+        position = 0
+        for length, produce in self.pieces():
+            piece_start, position = position, position + length
+            if position <= start or length == 0:
+                continue
+            if piece_start >= end:
+                break
+            for chunk in produce(max(start - piece_start, 0), min(end, position) - piece_start):
+                buffer += chunk
+                if len(buffer) >= CHUNK_SIZE:
+                    yield bytes(buffer)
+                    buffer.clear()
+        if buffer:
+            yield bytes(buffer)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Precompressed File Variants
+gzip (and brotli, when the brotli package is installed) copies of workflow
+files and static assets, stored by content digest so they can be served
+as-is instead of being compressed on every request.
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# (Content-Encoding, file suffix), in server preference order
+ENCODINGS = ([('br', '.br')] if brotli else []) + [('gzip', '.gz')]
+
+# Same threshold as the dynamic GZip middleware; smaller files are served as-is
+MINIMUM_SIZE = 1000
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress at the highest level: this runs once per content, not per request."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Content codings an Accept-Encoding header allows (q > 0)."""
+    accepted = []
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.append(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStore:
+    """Directory of compressed variants named <digest><suffix>."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, digest: str, encoding: str) -> Path:
+        suffix = dict(ENCODINGS)[encoding]
+        return Path(self.directory) / f"{digest}{suffix}"
+
+    def has_variants(self, digest: str) -> bool:
+        return all(self.path(digest, encoding).is_file() for encoding, _ in ENCODINGS)
+
+    def ensure(self, digest: str, data: bytes) -> int:
+        """Write any missing variants of data; returns how many were written."""
+        if len(data) < MINIMUM_SIZE:
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        written = 0
+        for encoding, _ in ENCODINGS:
+            path = self.path(digest, encoding)
+            if path.is_file():
+                continue
+            # Unique temp name: other processes may write the same variant concurrently
+            fd, tmp_path = tempfile.mkstemp(prefix=f"{path.name}.", suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(compress(data, encoding))
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            written += 1
+        return written
+
+    def lookup(self, digest: str, accept_encoding: str) -> Optional[Tuple[Path, str]]:
+        """Best stored variant the client accepts, as (path, encoding), or None."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in accepted or '*' in accepted:
+                path = self.path(digest, encoding)
+                if path.is_file():
+                    return path, encoding
+        return None
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """Delete variants whose digest is not in keep (temp files of writers in progress stay)."""
+        if not os.path.isdir(self.directory):
+            return 0
+        keep = set(keep)
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.tmp'):
+                continue
+            digest, _ = os.path.splitext(entry.name)
+            if digest not in keep:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue  # Pruned by another process
+                removed += 1
+        return removed
+
+
+class StaticVariants:
+    """Precompressed variants of files on disk, refreshed when a file changes."""
+
+    def __init__(self, store: PrecompressedStore):
+        self.store = store
+        self._digests: Dict[str, Tuple[int, int, str]] = {}
+
+    def digest(self, path: str, stat_result: os.stat_result) -> str:
+        """Content digest of a file, recomputed (and recompressed) only when it changes."""
+        cached = self._digests.get(path)
+        if cached and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            return cached[2]
+
+        data = Path(path).read_bytes()
+        digest = hashlib.md5(data).hexdigest()
+        self.store.ensure(digest, data)
+        self._digests[path] = (stat_result.st_mtime_ns, stat_result.st_size, digest)
+        return digest
+
+    def prepare(self, directory: str) -> int:
+        """Precompress every file under directory and drop variants of old content."""
+        if not os.path.isdir(directory):
+            return 0
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                self.digest(path, os.stat(path))
+        self.store.prune(digest for _, _, digest in self._digests.values())
+        return len(self._digests)
+
+    def lookup(self, path: str, stat_result: os.stat_result,
+               accept_encoding: str) -> Optional[Tuple[Path, str]]:
+        return self.store.lookup(self.digest(path, stat_result), accept_encoding)
@@ -5,14 +5,97 @@ SQLite-based workflow indexer and search engine for instant performance.
 """
 
 import sqlite3
+import asyncio
+import contextvars
+import functools
 import json
 import os
 import glob
 import datetime
 import hashlib
-from typing import Dict, List, Any, Optional, Tuple
+import random
+import struct
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterator, Optional, Tuple
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows: the writer lock only covers this process
+    fcntl = None
+
+import numpy as np
+
+from create_categories import categorize_by_filename, extract_tokens_from_filename, find_matching_category, load_def_categories
+from workflow_archive import ArchiveMember, ZipArchive
+from workflow_compression import PrecompressedStore
+from workflow_metrics import Histogram, cache_result
+from workflow_progress import IndexProgress
+from workflow_timing import connection_class, current_timing, decode_json, phase
+from workflow_vectors import N_FEATURES, WorkflowVectorIndex
+
+# Bump whenever the indexer starts deriving new data from workflow files so
+# existing databases are fully reprocessed on the next index run.
+INDEX_VERSION = 8
+
+# Bump whenever generate_mermaid_diagram output changes; cached diagrams are
+# dropped on the next start.
+DIAGRAM_VERSION = 1
+
+# How long a request waits to cache a rendered diagram before giving up (the
+# indexer holds the write lock for a whole run)
+DIAGRAM_CACHE_WRITE_TIMEOUT_MS = 50
+
+# How long writers wait for the writer lock: schema setup waits for an index run
+# in another process to finish setting up, index runs only outlast short writes
+# (a diagram being cached) and then give way to the process already indexing
+SCHEMA_LOCK_WAIT_SECONDS = 30.0
+INDEX_LOCK_WAIT_SECONDS = 1.0
+
+# Nice value of the indexing thread (Linux schedules threads individually)
+INDEX_THREAD_NICENESS = 10
+
+DB_CALL_SECONDS = Histogram(
+    'workflow_db_call_duration_seconds', 'Time spent in database calls made through the async pool', ['method']
+)
+FILE_IO_SECONDS = Histogram(
+    'workflow_file_io_duration_seconds', 'Time spent in file reads made through the async pool', ['call']
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    'workflow_db_pool_wait_seconds', 'Time database calls and file reads waited for a free pool thread'
+)
+
+# MinHash / LSH parameters for structural similarity (64 hashes = 16 bands x 4 rows)
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+_MINHASH_PRIME = (1 << 61) - 1
+_MINHASH_MAX = (1 << 32) - 1
+_minhash_rng = random.Random(1337)
+_MINHASH_PARAMS = [
+    (_minhash_rng.randint(1, _MINHASH_PRIME - 1), _minhash_rng.randint(0, _MINHASH_PRIME - 1))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+# Server-side sort keys -> ORDER BY terms ({t} is the table alias prefix). Each
+# has a covering index (sort terms, id, filter columns) so a sorted browse is an
+# index walk.
+SORT_EXPRESSIONS = {
+    'name': ["{t}name"],
+    'node_count': ["{t}node_count"],
+    'updated_at': ["{t}updated_at"],
+    'created_at': ["{t}created_at"],
+    'complexity': ["CASE {t}complexity WHEN 'low' THEN 0 WHEN 'medium' THEN 1 ELSE 2 END", "{t}node_count"],
+    'analyzed_at': ["{t}analyzed_at"],
+}
+SORT_FILTER_COLUMNS = "active, trigger_type, complexity, category"
+
+
 class WorkflowDatabase:
     """High-performance SQLite database for workflow metadata and search."""
     
@@ -22,10 +105,27 @@ class WorkflowDatabase:
             db_path = os.environ.get('WORKFLOW_DB_PATH', 'workflows.db')
         self.db_path = db_path
         self.workflows_dir = "workflows"
+        self.vectors_dir = f"{db_path}.vectors"
+        self.compressed_workflows = PrecompressedStore(os.path.join(f"{db_path}.compressed", "workflows"))
+        self._vector_index = None
+        self._vector_index_mtime = None
+        self._path_cache: Dict[str, str] = {}
+        self._local = threading.local()
+        self._writer_mutex = threading.Lock()
+        self.index_progress = IndexProgress(f"{db_path}.reindex.json")
         self.init_database()
     
     def init_database(self):
-        """Initialize SQLite database with optimized schema and indexes."""
+        """Initialize SQLite database with optimized schema and indexes (under the writer lock)."""
+        with self.writer_lock(wait=SCHEMA_LOCK_WAIT_SECONDS) as acquired:
+            if not acquired:
+                # Only the process holding the lock writes, and it set the schema up first
+                print("⏳ Another process holds the writer lock; using the schema it set up")
+                return
+            self.create_schema()
+    
+    def create_schema(self):
+        """Create or migrate the tables, indexes and triggers (caller holds the writer lock)."""
         conn = sqlite3.connect(self.db_path)
         conn.execute("PRAGMA journal_mode=WAL")  # Write-ahead logging for performance
         conn.execute("PRAGMA synchronous=NORMAL")
@@ -50,10 +150,18 @@ class WorkflowDatabase:
                 updated_at TEXT,
                 file_hash TEXT,
                 file_size INTEGER,
-                analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                node_text TEXT,    -- node names and sticky-note text
+                file_path TEXT,    -- path relative to workflows_dir
+                category TEXT DEFAULT 'Uncategorized'  -- see categorize_workflow
             )
         """)
         
+        # Add columns introduced after the first schema to existing databases
+        self.ensure_column(conn, 'workflows', 'node_text', 'TEXT')
+        self.ensure_column(conn, 'workflows', 'file_path', 'TEXT')
+        self.ensure_column(conn, 'workflows', 'category', "TEXT DEFAULT 'Uncategorized'")
+        
         # Create FTS5 table for full-text search
         conn.execute("""
             CREATE VIRTUAL TABLE IF NOT EXISTS workflows_fts USING fts5(
@@ -73,6 +181,105 @@ class WorkflowDatabase:
         conn.execute("CREATE INDEX IF NOT EXISTS idx_active ON workflows(active)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_node_count ON workflows(node_count)")
         conn.execute("CREATE INDEX IF NOT EXISTS idx_filename ON workflows(filename)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_category ON workflows(category)")
+        
+        # Key/value metadata about the index itself (version, generation, ...)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS index_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        """)
+        
+        # Covering indexes for server-side sorting, rebuilt when their filter columns change
+        if self.get_meta(conn, 'sort_filter_columns') != SORT_FILTER_COLUMNS:
+            for sort_key in SORT_EXPRESSIONS:
+                conn.execute(f"DROP INDEX IF EXISTS idx_sort_{sort_key}")
+            self.set_meta(conn, 'sort_filter_columns', SORT_FILTER_COLUMNS)
+        for sort_key, terms in SORT_EXPRESSIONS.items():
+            columns = ", ".join(term.format(t='') for term in terms)
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_sort_{sort_key} "
+                f"ON workflows({columns}, id, {SORT_FILTER_COLUMNS})"
+            )
+        
+        # MinHash signatures and LSH buckets for structural similarity
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_signatures (
+                workflow_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_lsh (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                workflow_id INTEGER NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_bucket ON workflow_lsh(band, bucket)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_workflow ON workflow_lsh(workflow_id)")
+        
+        # Materialized service-category membership (see get_service_categories)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_service_categories (
+                category TEXT NOT NULL,
+                workflow_id INTEGER NOT NULL,
+                PRIMARY KEY (category, workflow_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_service_categories_workflow ON workflow_service_categories(workflow_id)")
+        
+        # Per-integration aggregates, rebuilt by the indexer
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS integration_stats (
+                integration TEXT PRIMARY KEY,
+                workflow_count INTEGER NOT NULL,
+                active_count INTEGER NOT NULL,
+                triggers TEXT NOT NULL,         -- JSON object trigger_type -> count
+                top_cooccurring TEXT NOT NULL   -- JSON array of {name, count}
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_integration_stats_name ON integration_stats(integration COLLATE NOCASE)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_integration_stats_count ON integration_stats(workflow_count DESC, integration)")
+        
+        # Integration co-occurrence (both directions), with lift and PMI
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS integration_pairs (
+                integration TEXT NOT NULL,
+                other TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                lift REAL NOT NULL,
+                pmi REAL NOT NULL,
+                PRIMARY KEY (integration, other)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_integration_pairs_count ON integration_pairs(count DESC)")
+        
+        # Materialized statistics, refreshed by the indexer (single row)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total INTEGER NOT NULL,
+                active INTEGER NOT NULL,
+                total_nodes INTEGER NOT NULL,
+                unique_integrations INTEGER NOT NULL,
+                triggers TEXT NOT NULL,    -- JSON object
+                complexity TEXT NOT NULL,  -- JSON object
+                last_indexed TEXT NOT NULL
+            )
+        """)
+        
+        # Rendered Mermaid diagrams, keyed by workflow content
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS diagrams (
+                file_hash TEXT PRIMARY KEY,
+                diagram TEXT NOT NULL
+            )
+        """)
+        if self.get_meta(conn, 'diagram_version') != str(DIAGRAM_VERSION):
+            conn.execute("DELETE FROM diagrams")
+            self.set_meta(conn, 'diagram_version', str(DIAGRAM_VERSION))
         
         # Create triggers to keep FTS table in sync
         conn.execute("""
@@ -101,6 +308,95 @@ class WorkflowDatabase:
         conn.commit()
         conn.close()
     
+    def connect(self, check_same_thread: bool = True, read_only: bool = False) -> sqlite3.Connection:
+        """Open a connection with dict-like rows (read_only: mode=ro, writes raise)."""
+        if read_only:
+            uri = f"{Path(self.db_path).absolute().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread,
+                                   factory=connection_class())
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=check_same_thread,
+                                   factory=connection_class())
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def read_connection(self) -> sqlite3.Connection:
+        """Per-thread read-only connection, opened once and reused (callers must not close it)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.connect(read_only=True)
+            self._local.conn = conn
+        return conn
+    
+    def close_read_connection(self):
+        """Close this thread's read connection (e.g. before forking; it reopens on demand)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
+    @contextmanager
+    def writer_lock(self, wait: float = 0.0) -> Iterator[bool]:
+        """Exclusive lock held by every write to this DB, shared by all processes using it.
+        
+        Yields whether the lock was acquired, after waiting up to `wait` seconds
+        (by default not at all). Re-entrant within a thread, so indexing can
+        call other locked writers (e.g. precompress_workflows).
+        """
+        if getattr(self._local, 'writer', False):
+            yield True
+            return
+        deadline = time.monotonic() + wait
+        locked = self._writer_mutex.acquire(timeout=wait) if wait > 0 else self._writer_mutex.acquire(blocking=False)
+        if not locked:
+            yield False
+            return
+        
+        lock_file = None
+        try:
+            if fcntl is not None:
+                lock_file = open(f"{self.db_path}.lock", 'w')
+                while True:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except OSError:
+                        if time.monotonic() >= deadline:
+                            yield False
+                            return
+                        time.sleep(0.05)
+            self._local.writer = True
+            try:
+                yield True
+            finally:
+                self._local.writer = False
+        finally:
+            if lock_file is not None:
+                lock_file.close()  # Releases the flock
+            self._writer_mutex.release()
+    
+    @contextmanager
+    def read_transaction(self) -> Iterator[sqlite3.Connection]:
+        """Yield this thread's read connection inside a single read transaction (consistent snapshot).
+        
+        Nested use joins the transaction already open on the connection.
+        """
+        conn = self.read_connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+    
+    def ensure_column(self, conn: sqlite3.Connection, table: str, column: str, definition: str):
+        """Add a column to an existing table if it is missing."""
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    
     def get_file_hash(self, file_path: str) -> str:
         """Get MD5 hash of file for change detection."""
         hash_md5 = hashlib.md5()
@@ -202,6 +498,14 @@ class WorkflowDatabase:
         # Generate description
         workflow['description'] = self.generate_description(workflow, trigger_type, integrations)
         
+        # Free text for semantic search: node names plus sticky-note content
+        workflow['node_text'] = self.extract_node_text(workflow['nodes'])
+        
+        # Structural fingerprint for similarity search
+        workflow['minhash'] = self.compute_minhash(
+            self.structural_features(workflow['nodes'], workflow['connections'])
+        )
+        
         return workflow
     
     def analyze_nodes(self, nodes: List[Dict]) -> Tuple[str, set]:
@@ -383,6 +687,76 @@ class WorkflowDatabase:
         
         return trigger_type, integrations
     
+    def extract_node_text(self, nodes: List[Dict]) -> str:
+        """Collect node names and sticky-note text of a workflow."""
+        parts = []
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            parts.append(str(node.get('name', '')))
+            if node.get('type', '').lower().endswith('stickynote'):
+                parameters = node.get('parameters') or {}
+                if isinstance(parameters, dict):
+                    parts.append(str(parameters.get('content', '')))
+        return '\n'.join(part for part in parts if part)
+    
+    def structural_features(self, nodes: List[Dict], connections: Dict) -> set:
+        """Build the set of node types and typed connection pairs of a workflow."""
+        node_types = {}
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            node_type = node.get('type', '')
+            # Sticky notes are documentation, not structure
+            if not node_type or node_type.lower().endswith('stickynote'):
+                continue
+            node_types[node.get('name', '')] = node_type
+        
+        features = {f"node:{node_type}" for node_type in node_types.values()}
+        
+        if isinstance(connections, dict):
+            for source_name, outputs in connections.items():
+                source_type = node_types.get(source_name)
+                if not source_type or not isinstance(outputs, dict):
+                    continue
+                for output_groups in outputs.values():
+                    if not isinstance(output_groups, list):
+                        continue
+                    for group in output_groups:
+                        if not isinstance(group, list):
+                            continue
+                        for connection in group:
+                            if not isinstance(connection, dict):
+                                continue
+                            target_type = node_types.get(connection.get('node'))
+                            if target_type:
+                                features.add(f"edge:{source_type}>{target_type}")
+        
+        return features
+    
+    def compute_minhash(self, features: set) -> Optional[List[int]]:
+        """Compute a MinHash signature for a feature set (None if the set is empty)."""
+        if not features:
+            return None
+        
+        hashes = [
+            int.from_bytes(hashlib.sha1(feature.encode('utf-8')).digest()[:4], 'little')
+            for feature in features
+        ]
+        return [
+            min(((a * h + b) % _MINHASH_PRIME) & _MINHASH_MAX for h in hashes)
+            for a, b in _MINHASH_PARAMS
+        ]
+    
+    def lsh_buckets(self, signature: List[int]) -> List[Tuple[int, int]]:
+        """Split a MinHash signature into (band, bucket) pairs for LSH lookup."""
+        buckets = []
+        for band in range(LSH_BANDS):
+            rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+            digest = hashlib.md5(struct.pack(f'<{LSH_ROWS}I', *rows)).digest()
+            buckets.append((band, int.from_bytes(digest[:8], 'big', signed=True)))
+        return buckets
+    
     def generate_description(self, workflow: Dict, trigger_type: str, integrations: set) -> str:
         """Generate a descriptive summary of the workflow."""
         name = workflow['name']
@@ -429,8 +803,33 @@ class WorkflowDatabase:
         
         return desc + "."
     
-    def index_all_workflows(self, force_reindex: bool = False) -> Dict[str, int]:
-        """Index all workflow files. Only reprocesses changed files unless force_reindex=True."""
+    def index_all_workflows(self, force_reindex: bool = False, prerender_diagrams: bool = False) -> Dict[str, int]:
+        """Index all workflow files. Only reprocesses changed files unless force_reindex=True.
+        
+        With prerender_diagrams=True, Mermaid diagrams are rendered for every
+        workflow that does not have one cached yet. Only one process indexes at
+        a time: while another holds the writer lock this returns at once with busy=True.
+        """
+        with self.writer_lock(wait=INDEX_LOCK_WAIT_SECONDS) as acquired:
+            if not acquired:
+                print("⏳ Another process is already indexing; skipped")
+                return {'processed': 0, 'skipped': 0, 'errors': 0, 'busy': True}
+            
+            self.index_progress.start(force_reindex)
+            try:
+                stats = self.index_workflows(force_reindex, prerender_diagrams)
+            except Exception as e:
+                self.index_progress.fail(e)
+                raise
+            self.index_progress.finish(stats)
+            return stats
+    
+    def get_index_status(self) -> Dict[str, Any]:
+        """Status of the running or last index run, from any process (see IndexProgress)."""
+        return self.index_progress.read()
+    
+    def index_workflows(self, force_reindex: bool, prerender_diagrams: bool) -> Dict[str, int]:
+        """The indexing pass of index_all_workflows (caller holds the writer lock)."""
         if not os.path.exists(self.workflows_dir):
             print(f"Warning: Workflows directory '{self.workflows_dir}' not found.")
             return {'processed': 0, 'skipped': 0, 'errors': 0}
@@ -443,25 +842,40 @@ class WorkflowDatabase:
             return {'processed': 0, 'skipped': 0, 'errors': 0}
         
         print(f"Indexing {len(json_files)} workflow files...")
+        self.index_progress.update(phase='indexing', done=0, total=len(json_files))
         
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         
         stats = {'processed': 0, 'skipped': 0, 'errors': 0}
         
-        for file_path in json_files:
+        # Databases built by an older indexer lack derived data, so reprocess everything
+        if self.get_meta(conn, 'index_version') != str(INDEX_VERSION):
+            force_reindex = True
+        
+        category_rules, category_rules_digest = self.load_category_rules()
+        
+        for done, file_path in enumerate(json_files):
+            self.index_progress.update(done=done)
             filename = os.path.basename(file_path)
+            relative_path = Path(file_path).relative_to(workflows_path).as_posix()
             
             try:
                 # Check if file needs to be reprocessed
                 if not force_reindex:
                     current_hash = self.get_file_hash(file_path)
                     cursor = conn.execute(
-                        "SELECT file_hash FROM workflows WHERE filename = ?", 
+                        "SELECT file_hash, file_path FROM workflows WHERE filename = ?", 
                         (filename,)
                     )
                     row = cursor.fetchone()
                     if row and row['file_hash'] == current_hash:
+                        # Unchanged content, but the file may have moved to another folder
+                        if row['file_path'] != relative_path:
+                            conn.execute(
+                                "UPDATE workflows SET file_path = ? WHERE filename = ?",
+                                (relative_path, filename)
+                            )
                         stats['skipped'] += 1
                         continue
                 
@@ -472,12 +886,12 @@ class WorkflowDatabase:
                     continue
                 
                 # Insert or update in database
-                conn.execute("""
+                cursor = conn.execute("""
                     INSERT OR REPLACE INTO workflows (
                         filename, name, workflow_id, active, description, trigger_type,
                         complexity, node_count, integrations, tags, created_at, updated_at,
-                        file_hash, file_size, analyzed_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                        file_hash, file_size, analyzed_at, node_text, file_path, category
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?, ?)
                 """, (
                     workflow_data['filename'],
                     workflow_data['name'],
@@ -492,9 +906,19 @@ class WorkflowDatabase:
                     workflow_data['created_at'],
                     workflow_data['updated_at'],
                     workflow_data['file_hash'],
-                    workflow_data['file_size']
+                    workflow_data['file_size'],
+                    workflow_data['node_text'],
+                    relative_path,
+                    self.categorize_workflow(filename, category_rules)
                 ))
                 
+                self.store_signature(conn, cursor.lastrowid, workflow_data['minhash'])
+                self.store_service_categories(conn, cursor.lastrowid, workflow_data['integrations'])
+                if prerender_diagrams:
+                    self.store_diagram(conn, workflow_data['file_hash'], generate_mermaid_diagram(
+                        workflow_data['nodes'], workflow_data['connections']
+                    ))
+                
                 stats['processed'] += 1
                 
             except Exception as e:
@@ -502,21 +926,303 @@ class WorkflowDatabase:
                 stats['errors'] += 1
                 continue
         
+        self.index_progress.update(phase='analytics', done=len(json_files))
+        
+        # INSERT OR REPLACE assigns new ids, drop side rows of replaced workflows
+        conn.execute("DELETE FROM workflow_signatures WHERE workflow_id NOT IN (SELECT id FROM workflows)")
+        conn.execute("DELETE FROM workflow_lsh WHERE workflow_id NOT IN (SELECT id FROM workflows)")
+        conn.execute("DELETE FROM workflow_service_categories WHERE workflow_id NOT IN (SELECT id FROM workflows)")
+        conn.execute("DELETE FROM diagrams WHERE file_hash NOT IN (SELECT file_hash FROM workflows)")
+        self.set_meta(conn, 'index_version', str(INDEX_VERSION))
+        
+        # Category definitions changed: recategorize the workflows that were not reprocessed
+        recategorized = 0
+        if self.get_meta(conn, 'category_rules') != category_rules_digest:
+            recategorized = self.recategorize_workflows(conn, category_rules)
+            self.set_meta(conn, 'category_rules', category_rules_digest)
+        
+        if prerender_diagrams:
+            self.prerender_diagrams(conn)
+        
+        if stats['processed'] or recategorized or conn.execute("SELECT 1 FROM workflow_stats").fetchone() is None:
+            self.refresh_integration_stats(conn)
+            self.refresh_stats(conn)
+            self.bump_generation(conn)
+        
         conn.commit()
+        self._path_cache.clear()
+        
+        if stats['processed'] or not os.path.exists(self.vectors_dir):
+            self.index_progress.update(phase='vectors')
+            self.build_vector_index(conn)
+        
+        self.index_progress.update(phase='compressing')
+        self.precompress_workflows(conn)
         conn.close()
         
         print(f"✅ Indexing complete: {stats['processed']} processed, {stats['skipped']} skipped, {stats['errors']} errors")
         return stats
     
-    def search_workflows(self, query: str = "", trigger_filter: str = "all", 
-                        complexity_filter: str = "all", category_filter: str = "all",
-                        active_only: bool = False,
-                        limit: int = 50, offset: int = 0) -> Tuple[List[Dict], int]:
-        """Fast search with filters and pagination."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def get_workflow(self, filename: str) -> Optional[Dict]:
+        """Fetch one workflow's metadata by exact filename (unique index lookup)."""
+        workflows = self.get_workflows([filename])
+        return workflows[0] if workflows else None
+    
+    def get_workflows(self, filenames: List[str]) -> List[Dict]:
+        """Fetch several workflows by exact filename in one IN query, in the order given."""
+        if not filenames:
+            return []
+        
+        conn = self.read_connection()
+        placeholders = ",".join("?" for _ in filenames)
+        rows = conn.execute(
+            f"SELECT * FROM workflows WHERE filename IN ({placeholders})",
+            list(filenames)
+        ).fetchall()
+        
+        by_filename = {row['filename']: self.row_to_workflow(row) for row in rows}
+        return [by_filename[filename] for filename in filenames if filename in by_filename]
+    
+    def get_workflow_path(self, filename: str) -> Optional[Path]:
+        """Resolve a workflow filename to its file via the indexed path (cached in memory).
         
-        # Build WHERE clause
+        Returns None for filenames that are not indexed or whose file is gone.
+        """
+        cached = self._path_cache.get(filename)
+        cache_result('workflow_path', cached is not None)
+        if cached is not None:
+            file_path = Path(self.workflows_dir) / cached
+            if file_path.is_file():
+                return file_path
+            # Moved or deleted since it was cached: the index may know the new path
+            self._path_cache.pop(filename, None)
+        
+        conn = self.read_connection()
+        row = conn.execute("SELECT file_path FROM workflows WHERE filename = ?", (filename,)).fetchone()
+        if not row or not row[0] or row[0] == cached:
+            return None
+        file_path = Path(self.workflows_dir) / row[0]
+        if not file_path.is_file():
+            return None  # Moved or deleted since indexing
+        self._path_cache[filename] = row[0]
+        return file_path
+    
+    def warm_path_cache(self) -> int:
+        """Load every filename -> indexed path mapping into the path cache at once."""
+        rows = self.read_connection().execute(
+            "SELECT filename, file_path FROM workflows WHERE file_path IS NOT NULL"
+        ).fetchall()
+        self._path_cache.update((filename, file_path) for filename, file_path in rows)
+        return len(rows)
+    
+    def load_category_rules(self) -> Tuple[Dict[str, str], str]:
+        """Integration -> category map from context/def_categories.json, and a digest of it."""
+        try:
+            rules = load_def_categories()
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: category definitions not loaded ({e}); workflows will be Uncategorized")
+            rules = {}
+        digest = hashlib.md5(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()
+        return rules, digest
+    
+    def categorize_workflow(self, filename: str, category_rules: Dict[str, str]) -> str:
+        """Use-case category of a workflow, as create_categories.py assigns it."""
+        category = find_matching_category(extract_tokens_from_filename(filename), category_rules)
+        return category or categorize_by_filename(filename) or 'Uncategorized'
+    
+    def recategorize_workflows(self, conn: sqlite3.Connection, category_rules: Dict[str, str]) -> int:
+        """Recompute the category of every workflow; returns how many changed (caller commits)."""
+        changes = []
+        for workflow_id, filename, current in conn.execute("SELECT id, filename, category FROM workflows").fetchall():
+            category = self.categorize_workflow(filename, category_rules)
+            if category != current:
+                changes.append((category, workflow_id))
+        conn.executemany("UPDATE workflows SET category = ? WHERE id = ?", changes)
+        return len(changes)
+    
+    def get_categories(self) -> List[str]:
+        """Categories present in the index (always including Uncategorized), sorted."""
+        rows = self.read_connection().execute("SELECT DISTINCT category FROM workflows WHERE category IS NOT NULL")
+        return sorted({row[0] for row in rows} | {'Uncategorized'})
+    
+    def precompress_workflows(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Store gzip/brotli variants of indexed workflow files that lack them.
+        
+        Variants are keyed by file_hash, so unchanged files are skipped and
+        variants of replaced content are pruned. Takes the writer lock, so with
+        several worker processes only one does the work.
+        """
+        with self.writer_lock(wait=INDEX_LOCK_WAIT_SECONDS) as acquired:
+            if not acquired:
+                return 0  # The process holding the lock precompresses when it finishes
+            
+            own_conn = conn is None
+            if own_conn:
+                conn = self.connect()
+            rows = conn.execute("SELECT filename, file_path, file_hash FROM workflows").fetchall()
+            if own_conn:
+                conn.close()
+            
+            written = 0
+            for filename, relative_path, file_hash in rows:
+                if not file_hash or self.compressed_workflows.has_variants(file_hash):
+                    continue
+                try:
+                    data = (Path(self.workflows_dir) / (relative_path or filename)).read_bytes()
+                except OSError:
+                    continue
+                # Only store content that matches the index (the file may have changed since)
+                if hashlib.md5(data).hexdigest() == file_hash:
+                    written += self.compressed_workflows.ensure(file_hash, data)
+            
+            self.compressed_workflows.prune(file_hash for _, _, file_hash in rows)
+            if written:
+                print(f"✅ Precompressed {written} workflow file variants")
+            return written
+    
+    def store_diagram(self, conn: sqlite3.Connection, file_hash: str, diagram: str):
+        """Cache a rendered diagram under its workflow content hash (caller commits)."""
+        conn.execute("INSERT OR REPLACE INTO diagrams (file_hash, diagram) VALUES (?, ?)", (file_hash, diagram))
+    
+    def prerender_diagrams(self, conn: sqlite3.Connection) -> int:
+        """Render and cache diagrams of indexed workflows that have none yet (caller commits)."""
+        rows = conn.execute("""
+            SELECT filename, file_path, file_hash FROM workflows
+            WHERE file_hash NOT IN (SELECT file_hash FROM diagrams)
+        """).fetchall()
+        
+        rendered = 0
+        for filename, relative_path, file_hash in rows:
+            try:
+                with open(Path(self.workflows_dir) / (relative_path or filename), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError, UnicodeDecodeError) as e:
+                print(f"Error rendering diagram for {filename}: {str(e)}")
+                continue
+            self.store_diagram(conn, file_hash, generate_mermaid_diagram(
+                data.get('nodes', []), data.get('connections', {})
+            ))
+            rendered += 1
+        
+        if rendered:
+            print(f"✅ Prerendered {rendered} diagrams")
+        return rendered
+    
+    def get_diagram(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Look up a workflow's validators and cached diagram in one indexed query.
+        
+        Returns None for unknown filenames; 'diagram' is None if not rendered yet.
+        """
+        row = self.read_connection().execute("""
+            SELECT w.file_hash, w.analyzed_at, d.diagram
+            FROM workflows w
+            LEFT JOIN diagrams d ON d.file_hash = w.file_hash
+            WHERE w.filename = ?
+        """, (filename,)).fetchone()
+        return dict(row) if row else None
+    
+    def render_diagram(self, filename: str, file_hash: str) -> Optional[str]:
+        """Render a workflow's diagram from its file and cache it if the database is free.
+        
+        Returns None if the file is gone; invalid JSON raises json.JSONDecodeError.
+        Caching is best-effort: while another writer (e.g. an index run) holds
+        the database, the diagram is returned without being stored.
+        """
+        file_path = self.get_workflow_path(filename)
+        if file_path is None:
+            return None
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        diagram = generate_mermaid_diagram(data.get('nodes', []), data.get('connections', {}))
+        with self.writer_lock() as acquired:
+            if not acquired:
+                return diagram  # Cached by a later request, or prerendered by the index run
+            conn = self.connect()
+            try:
+                conn.execute(f"PRAGMA busy_timeout = {DIAGRAM_CACHE_WRITE_TIMEOUT_MS}")
+                self.store_diagram(conn, file_hash, diagram)
+                conn.commit()
+            except sqlite3.OperationalError as e:
+                print(f"Diagram for {filename} not cached: {str(e)}")
+            finally:
+                conn.close()
+        return diagram
+    
+    def get_meta(self, conn: sqlite3.Connection, key: str) -> Optional[str]:
+        """Read a value from the index_meta table."""
+        row = conn.execute("SELECT value FROM index_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, conn: sqlite3.Connection, key: str, value: str):
+        """Write a value to the index_meta table (caller commits)."""
+        conn.execute("INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)", (key, value))
+    
+    def bump_generation(self, conn: sqlite3.Connection) -> int:
+        """Advance the index generation after indexed data changed (caller commits)."""
+        generation = int(self.get_meta(conn, 'index_generation') or 0) + 1
+        self.set_meta(conn, 'index_generation', str(generation))
+        self.set_meta(conn, 'index_generated_at',
+                      datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S'))
+        return generation
+    
+    def get_index_generation(self) -> Tuple[int, Optional[str]]:
+        """Current index generation and when it was reached (UTC), for cache validators."""
+        conn = self.read_connection()
+        generation = self.get_meta(conn, 'index_generation')
+        return int(generation or 0), self.get_meta(conn, 'index_generated_at')
+    
+    def store_signature(self, conn: sqlite3.Connection, workflow_id: int, signature: Optional[List[int]]):
+        """Store the MinHash signature and LSH buckets of a workflow (caller commits)."""
+        conn.execute("DELETE FROM workflow_signatures WHERE workflow_id = ?", (workflow_id,))
+        conn.execute("DELETE FROM workflow_lsh WHERE workflow_id = ?", (workflow_id,))
+        if not signature:
+            return
+        
+        conn.execute(
+            "INSERT INTO workflow_signatures (workflow_id, signature) VALUES (?, ?)",
+            (workflow_id, struct.pack(f'<{MINHASH_PERMUTATIONS}I', *signature))
+        )
+        conn.executemany(
+            "INSERT INTO workflow_lsh (band, bucket, workflow_id) VALUES (?, ?, ?)",
+            [(band, bucket, workflow_id) for band, bucket in self.lsh_buckets(signature)]
+        )
+    
+    def store_service_categories(self, conn: sqlite3.Connection, workflow_id: int, integrations: List[str]):
+        """Store which service categories a workflow belongs to (caller commits)."""
+        conn.execute("DELETE FROM workflow_service_categories WHERE workflow_id = ?", (workflow_id,))
+        # Case-insensitive, like the LIKE matching this table replaces ('Youtube' is 'YouTube')
+        integrations = {integration.lower() for integration in integrations}
+        conn.executemany(
+            "INSERT INTO workflow_service_categories (category, workflow_id) VALUES (?, ?)",
+            [
+                (category, workflow_id)
+                for category, services in self.get_service_categories().items()
+                if integrations.intersection(service.lower() for service in services)
+            ]
+        )
+    
+    def row_to_workflow(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a workflows row to a dict with parsed integrations and tags."""
+        workflow = dict(row)
+        workflow.pop('node_text', None)  # search text only, can be large
+        workflow['integrations'] = decode_json(workflow['integrations'] or '[]')
+        
+        # Parse tags and convert dict tags to strings
+        raw_tags = decode_json(workflow['tags'] or '[]')
+        clean_tags = []
+        for tag in raw_tags:
+            if isinstance(tag, dict):
+                # Extract name from tag dict if available
+                clean_tags.append(tag.get('name', str(tag.get('id', 'tag'))))
+            else:
+                clean_tags.append(str(tag))
+        workflow['tags'] = clean_tags
+        return workflow
+    
+    def build_filters(self, trigger_filter: str = "all", complexity_filter: str = "all",
+                      category_filter: str = "all", active_only: bool = False) -> Tuple[List[str], List[Any]]:
+        """Build WHERE conditions (on alias w) and parameters for the common filters."""
         where_conditions = []
         params = []
         
@@ -535,6 +1241,71 @@ class WorkflowDatabase:
             where_conditions.append("w.category = ?")
             params.append(category_filter)
         
+        return where_conditions, params
+    
+    def sort_clause(self, sort: str, order: str = "asc") -> str:
+        """ORDER BY clause (on alias w) for a sort key, with id as tie-breaker."""
+        direction = "DESC" if order.lower() == "desc" else "ASC"
+        terms = [term.format(t='w.') for term in SORT_EXPRESSIONS[sort]] + ["w.id"]
+        return ", ".join(f"{term} {direction}" for term in terms)
+    
+    def browse_query(self, where_conditions: List[str], sort: str, order: str,
+                     limit: int, offset: int) -> str:
+        """Build a non-FTS page query that walks the covering index of the sort key.
+        
+        The inner query pages over index entries only; the outer join then loads
+        the full rows of just that page (and re-sorts those few rows).
+        """
+        order_by = self.sort_clause(sort, order)
+        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+        return f"""
+            SELECT w.*, 0 as rank
+            FROM (
+                SELECT w.id
+                FROM workflows w INDEXED BY idx_sort_{sort}
+                WHERE {where_clause}
+                ORDER BY {order_by}
+                LIMIT {limit} OFFSET {offset}
+            ) page
+            JOIN workflows w ON w.id = page.id
+            ORDER BY {order_by}
+        """
+    
+    def explain_browse(self, sort: str, order: str = "asc", trigger_filter: str = "all",
+                       complexity_filter: str = "all", category_filter: str = "all",
+                       active_only: bool = False) -> List[str]:
+        """Return the EXPLAIN QUERY PLAN details of a sorted browse page query."""
+        where_conditions, params = self.build_filters(
+            trigger_filter, complexity_filter, category_filter, active_only
+        )
+        sql = self.browse_query(where_conditions, sort, order, 20, 0)
+        conn = self.read_connection()
+        plan = [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        return plan
+    
+    def search_workflows(self, query: str = "", trigger_filter: str = "all", 
+                        complexity_filter: str = "all", category_filter: str = "all",
+                        active_only: bool = False,
+                        limit: int = 50, offset: int = 0,
+                        conn: Optional[sqlite3.Connection] = None,
+                        sort: Optional[str] = None, order: str = "asc",
+                        raw_rows: bool = False) -> Tuple[List[Dict], int]:
+        """Fast search with filters, sorting and pagination.
+        
+        Without a query, results are paged over the covering index of the sort key
+        (analyzed_at DESC by default) and only the page rows are fetched from the table.
+        With raw_rows=True the page is returned as unconverted sqlite3.Row objects.
+        """
+        if sort is not None and sort not in SORT_EXPRESSIONS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        
+        conn = conn or self.read_connection()
+        
+        # Build WHERE clause
+        where_conditions, params = self.build_filters(
+            trigger_filter, complexity_filter, category_filter, active_only
+        )
+        
         # Use FTS search if query provided
         if query.strip():
             # FTS search with ranking
@@ -558,45 +1329,232 @@ class WorkflowDatabase:
         
         # Count total results
         count_query = f"SELECT COUNT(*) as total FROM ({base_query}) t"
-        cursor = conn.execute(count_query, params)
-        total = cursor.fetchone()['total']
+        with phase('count'):
+            cursor = conn.execute(count_query, params)
+            total = cursor.fetchone()['total']
         
         # Get paginated results
         if query.strip():
-            base_query += " ORDER BY rank"
+            if sort:
+                base_query += f" ORDER BY {self.sort_clause(sort, order)}"
+            else:
+                base_query += " ORDER BY rank"
+            base_query += f" LIMIT {limit} OFFSET {offset}"
         else:
-            base_query += " ORDER BY w.analyzed_at DESC"
+            base_query = self.browse_query(where_conditions, sort or 'analyzed_at',
+                                           order if sort else 'desc', limit, offset)
         
-        base_query += f" LIMIT {limit} OFFSET {offset}"
-        
-        cursor = conn.execute(base_query, params)
-        rows = cursor.fetchall()
+        with phase('page'):
+            cursor = conn.execute(base_query, params)
+            rows = cursor.fetchall()
         
         # Convert to dictionaries and parse JSON fields
+        results = rows if raw_rows else [self.row_to_workflow(row) for row in rows]
+        
+        return results, total
+    
+    def iter_workflows(self, query: str = "", trigger_filter: str = "all",
+                       complexity_filter: str = "all", category_filter: str = "all",
+                       active_only: bool = False,
+                       sort: Optional[str] = None, order: str = "asc",
+                       batch_size: int = 500) -> Iterator[Dict]:
+        """Stream every matching workflow from a single cursor (no COUNT, no OFFSET).
+        
+        The query runs and its first batch is fetched before this returns, so
+        errors such as an invalid FTS query raise here rather than midway
+        through a streamed response. The connection may be advanced from
+        different threads (e.g. a streaming response iterated in a threadpool),
+        but only by one at a time.
+        """
+        if sort is not None and sort not in SORT_EXPRESSIONS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        
+        where_conditions, params = self.build_filters(
+            trigger_filter, complexity_filter, category_filter, active_only
+        )
+        
+        if query.strip():
+            sql = """
+                SELECT w.*, rank
+                FROM workflows_fts fts
+                JOIN workflows w ON w.id = fts.rowid
+                WHERE workflows_fts MATCH ?
+            """
+            params.insert(0, query)
+            if where_conditions:
+                sql += " AND " + " AND ".join(where_conditions)
+            sql += f" ORDER BY {self.sort_clause(sort, order) if sort else 'rank'}"
+        else:
+            sort_key = sort or 'analyzed_at'
+            where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+            sql = f"""
+                SELECT w.*, 0 as rank
+                FROM workflows w INDEXED BY idx_sort_{sort_key}
+                WHERE {where_clause}
+                ORDER BY {self.sort_clause(sort_key, order if sort else 'desc')}
+            """
+        
+        conn = self.connect(check_same_thread=False, read_only=True)
+        try:
+            cursor = conn.execute(sql, params)
+            rows = cursor.fetchmany(batch_size)
+        except Exception:
+            conn.close()
+            raise
+        return self.stream_rows(conn, cursor, rows, batch_size)
+    
+    def stream_rows(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor,
+                    rows: List[sqlite3.Row], batch_size: int) -> Iterator[Dict]:
+        """Yield workflows from an executed cursor, starting with its first batch; closes conn."""
+        try:
+            while rows:
+                for row in rows:
+                    yield self.row_to_workflow(row)
+                rows = cursor.fetchmany(batch_size)
+        finally:
+            conn.close()
+    
+    def archive_workflows(self, filenames: Optional[List[str]] = None, query: str = "",
+                          trigger_filter: str = "all", complexity_filter: str = "all",
+                          category_filter: str = "all", active_only: bool = False) -> ZipArchive:
+        """Lay out a ZIP archive of the given workflows, or of every match of the filters.
+        
+        Entries are named by their indexed path and ordered by it, so the same
+        selection always yields byte-identical archives (needed for Range requests).
+        Raises ValueError if the archive would exceed the ZIP32 limits.
+        """
+        conn = self.read_connection()
+        if filenames:
+            rows = []
+            unique = sorted(set(filenames))
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" for _ in batch)
+                rows.extend(conn.execute(
+                    f"SELECT file_path, file_hash FROM workflows WHERE filename IN ({placeholders})", batch
+                ).fetchall())
+        else:
+            where_conditions, params = self.build_filters(
+                trigger_filter, complexity_filter, category_filter, active_only
+            )
+            if query.strip():
+                sql = """
+                    SELECT w.file_path, w.file_hash
+                    FROM workflows_fts fts
+                    JOIN workflows w ON w.id = fts.rowid
+                    WHERE workflows_fts MATCH ?
+                """
+                params.insert(0, query)
+                if where_conditions:
+                    sql += " AND " + " AND ".join(where_conditions)
+            else:
+                where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+                sql = f"SELECT w.file_path, w.file_hash FROM workflows w WHERE {where_clause}"
+            rows = conn.execute(sql, params).fetchall()
+        
+        members = []
+        for file_path, file_hash in sorted(tuple(row) for row in rows if row[0]):
+            path = Path(self.workflows_dir) / file_path
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Moved or deleted since indexing
+            
+            member = None
+            variant = self.compressed_workflows.path(file_hash, 'gzip')
+            if variant.is_file():
+                member = ArchiveMember.from_gzip(file_path, variant, stat.st_mtime)
+            members.append(member or ArchiveMember.stored(file_path, path, stat.st_size, stat.st_mtime))
+        return ZipArchive(members)
+    
+    def build_vector_index(self, conn: Optional[sqlite3.Connection] = None):
+        """Rebuild the TF-IDF vector index from the database and save it next to the DB."""
+        own_conn = conn is None
+        if own_conn:
+            conn = sqlite3.connect(self.db_path)
+        
+        cursor = conn.execute("SELECT id, name, description, node_text FROM workflows")
+        index = WorkflowVectorIndex.build(
+            (row[0], '\n'.join(part or '' for part in row[1:])) for row in cursor
+        )
+        index.save(self.vectors_dir)
+        
+        if own_conn:
+            conn.close()
+        print(f"✅ Vector index built: {index.size} workflows, {N_FEATURES} features, {len(index.data)} non-zeros")
+    
+    def get_vector_index(self) -> Optional[WorkflowVectorIndex]:
+        """Memory-map the vector index, reloading it when it was rebuilt."""
+        meta_path = os.path.join(self.vectors_dir, 'meta.json')
+        try:
+            mtime = os.path.getmtime(meta_path)
+        except OSError:
+            return None
+        
+        if self._vector_index is None or mtime != self._vector_index_mtime:
+            self._vector_index = WorkflowVectorIndex.load(self.vectors_dir)
+            self._vector_index_mtime = mtime
+        return self._vector_index
+    
+    def semantic_search(self, query: str, trigger_filter: str = "all",
+                        complexity_filter: str = "all", category_filter: str = "all",
+                        active_only: bool = False,
+                        limit: int = 50, offset: int = 0,
+                        conn: Optional[sqlite3.Connection] = None,
+                        raw_rows: bool = False) -> Tuple[List[Dict], int]:
+        """Cosine-similarity search over the local TF-IDF index, with the usual filters.
+        
+        Filters select the workflows that are ranked, before the top-k cut, so
+        total counts every matching workflow and any page can be reached.
+        With raw_rows=True the page is returned as unconverted sqlite3.Row objects (no rank).
+        """
+        index = self.get_vector_index()
+        if index is None or not query.strip():
+            # No vector index yet: fall back to keyword search
+            return self.search_workflows(query, trigger_filter, complexity_filter, category_filter,
+                                         active_only, limit, offset, conn=conn, raw_rows=raw_rows)
+        
+        conn = conn or self.read_connection()
+        
+        # Indexed workflows passing the filters (also drops vectors of since-removed workflows)
+        where_conditions, params = self.build_filters(
+            trigger_filter, complexity_filter, category_filter, active_only
+        )
+        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
+        with phase('page'):
+            allowed_ids = np.fromiter(
+                (row[0] for row in conn.execute(f"SELECT w.id FROM workflows w WHERE {where_clause}", params)),
+                dtype=np.int64
+            )
+        
+        with phase('vectors'):
+            ranked, total = index.search_with_totals([query], k=offset + limit, allowed_ids=allowed_ids)[0]
+        ranked = ranked[offset:offset + limit]
+        if not ranked:
+            return [], total
+        
+        placeholders = ",".join("?" for _ in ranked)
+        with phase('page'):
+            rows = conn.execute(
+                f"SELECT w.* FROM workflows w WHERE w.id IN ({placeholders})",
+                [workflow_id for workflow_id, _ in ranked]
+            ).fetchall()
+        
+        # Back into rank order
+        position = {workflow_id: i for i, (workflow_id, _) in enumerate(ranked)}
+        rows.sort(key=lambda row: position[row['id']])
+        if raw_rows:
+            return rows, total
+        scores = dict(ranked)
         results = []
         for row in rows:
-            workflow = dict(row)
-            workflow['integrations'] = json.loads(workflow['integrations'] or '[]')
-            
-            # Parse tags and convert dict tags to strings
-            raw_tags = json.loads(workflow['tags'] or '[]')
-            clean_tags = []
-            for tag in raw_tags:
-                if isinstance(tag, dict):
-                    # Extract name from tag dict if available
-                    clean_tags.append(tag.get('name', str(tag.get('id', 'tag'))))
-                else:
-                    clean_tags.append(str(tag))
-            workflow['tags'] = clean_tags
-            
+            workflow = self.row_to_workflow(row)
+            workflow['rank'] = round(scores[row['id']], 4)
             results.append(workflow)
-        
-        conn.close()
         return results, total
     
-    def get_stats(self) -> Dict[str, Any]:
-        """Get database statistics."""
-        conn = sqlite3.connect(self.db_path)
+    def compute_stats(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Compute database statistics with full-table aggregates (index time only)."""
         conn.row_factory = sqlite3.Row
         
         # Basic counts
@@ -626,14 +1584,9 @@ class WorkflowDatabase:
         cursor = conn.execute("SELECT SUM(node_count) as total_nodes FROM workflows")
         total_nodes = cursor.fetchone()['total_nodes'] or 0
         
-        # Unique integrations count
-        cursor = conn.execute("SELECT integrations FROM workflows WHERE integrations != '[]'")
-        all_integrations = set()
-        for row in cursor.fetchall():
-            integrations = json.loads(row['integrations'])
-            all_integrations.update(integrations)
-        
-        conn.close()
+        # Unique integrations count (from the aggregate table)
+        cursor = conn.execute("SELECT COUNT(*) as unique_integrations FROM integration_stats")
+        unique_integrations = cursor.fetchone()['unique_integrations']
         
         return {
             'total': total,
@@ -642,9 +1595,191 @@ class WorkflowDatabase:
             'triggers': triggers,
             'complexity': complexity,
             'total_nodes': total_nodes,
-            'unique_integrations': len(all_integrations),
+            'unique_integrations': unique_integrations,
             'last_indexed': datetime.datetime.now().isoformat()
         }
+    
+    def refresh_stats(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Recompute statistics and store them in workflow_stats (caller commits)."""
+        stats = self.compute_stats(conn)
+        conn.execute("""
+            INSERT OR REPLACE INTO workflow_stats (
+                id, total, active, total_nodes, unique_integrations, triggers, complexity, last_indexed
+            ) VALUES (1, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            stats['total'],
+            stats['active'],
+            stats['total_nodes'],
+            stats['unique_integrations'],
+            json.dumps(stats['triggers']),
+            json.dumps(stats['complexity']),
+            stats['last_indexed']
+        ))
+        return stats
+    
+    def refresh_integration_stats(self, conn: sqlite3.Connection, top_cooccurring: int = 10):
+        """Rebuild integration_stats and integration_pairs (caller commits).
+        
+        Co-occurrence counts are the off-diagonal entries of AᵀA, where A is the
+        sparse workflow x integration incidence matrix; the diagonal holds the
+        per-integration workflow counts used for lift and PMI.
+        """
+        columns = {}  # integration -> column of A
+        active_counts = Counter()
+        triggers = defaultdict(Counter)
+        rows, cols = [], []
+        n_workflows = 0
+        
+        for row in conn.execute("SELECT integrations, trigger_type, active FROM workflows"):
+            for integration in set(json.loads(row[0] or '[]')):
+                column = columns.setdefault(integration, len(columns))
+                rows.append(n_workflows)
+                cols.append(column)
+                triggers[integration][row[1]] += 1
+                if row[2]:
+                    active_counts[integration] += 1
+            n_workflows += 1
+        
+        names = list(columns)
+        left, right, counts = sparse_gram(rows, cols)
+        totals = np.zeros(len(names), dtype=np.int64)
+        diagonal = left == right
+        totals[left[diagonal]] = counts[diagonal]
+        
+        left, right, counts = left[~diagonal], right[~diagonal], counts[~diagonal]
+        lift = counts * n_workflows / (totals[left] * totals[right])
+        pmi = np.log2(lift)
+        
+        pairs = [
+            (names[a], names[b], int(count), round(float(pair_lift), 4), round(float(pair_pmi), 4))
+            for a, b, count, pair_lift, pair_pmi in zip(left, right, counts, lift, pmi)
+        ]
+        conn.execute("DELETE FROM integration_pairs")
+        conn.executemany(
+            "INSERT INTO integration_pairs (integration, other, count, lift, pmi) VALUES (?, ?, ?, ?, ?)",
+            pairs
+        )
+        
+        cooccurrence = defaultdict(list)
+        for integration, other, count, _, _ in pairs:
+            cooccurrence[integration].append((-count, other))
+        
+        conn.execute("DELETE FROM integration_stats")
+        conn.executemany("""
+            INSERT INTO integration_stats (integration, workflow_count, active_count, triggers, top_cooccurring)
+            VALUES (?, ?, ?, ?, ?)
+        """, [
+            (
+                integration,
+                int(totals[column]),
+                active_counts[integration],
+                json.dumps(dict(triggers[integration])),
+                json.dumps([
+                    {'name': other, 'count': -negative_count}
+                    for negative_count, other in sorted(cooccurrence[integration])[:top_cooccurring]
+                ])
+            )
+            for integration, column in columns.items()
+        ])
+    
+    def get_integration_pairs(self, integration: Optional[str] = None, rank: str = "count",
+                              min_count: int = 1, limit: int = 20) -> List[Dict]:
+        """Top co-occurring integration pairs, overall or for one integration.
+        
+        rank is 'count', 'lift' or 'pmi'; min_count filters out rare pairs whose
+        lift/PMI would be noise.
+        """
+        order_by = {
+            'count': "count DESC, lift DESC",
+            'lift': "lift DESC, count DESC",
+            'pmi': "pmi DESC, count DESC",
+        }[rank]
+        
+        conn = self.read_connection()
+        if integration is None:
+            # Each unordered pair once
+            where_clause = "integration < other AND count >= ?"
+            params = [min_count]
+        else:
+            where_clause = "integration = ? AND count >= ?"
+            params = [integration, min_count]
+        
+        cursor = conn.execute(f"""
+            SELECT integration, other, count, lift, pmi
+            FROM integration_pairs
+            WHERE {where_clause}
+            ORDER BY {order_by}, integration, other
+            LIMIT {limit}
+        """, params)
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def get_integrations(self, prefix: str = "", limit: int = 50, offset: int = 0) -> Tuple[List[Dict], int]:
+        """Page through integration aggregates, optionally filtered by a name prefix."""
+        conn = self.read_connection()
+        
+        where_clause = "1=1"
+        params = []
+        if prefix:
+            # Case-insensitive prefix match served by the NOCASE index
+            escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            where_clause = "integration LIKE ? ESCAPE '\\'"
+            params.append(escaped + '%')
+        
+        cursor = conn.execute(f"SELECT COUNT(*) as total FROM integration_stats WHERE {where_clause}", params)
+        total = cursor.fetchone()['total']
+        
+        cursor = conn.execute(f"""
+            SELECT * FROM integration_stats
+            WHERE {where_clause}
+            ORDER BY workflow_count DESC, integration
+            LIMIT {limit} OFFSET {offset}
+        """, params)
+        
+        results = []
+        for row in cursor.fetchall():
+            results.append({
+                'name': row['integration'],
+                'workflow_count': row['workflow_count'],
+                'active_count': row['active_count'],
+                'triggers': json.loads(row['triggers']),
+                'top_cooccurring': json.loads(row['top_cooccurring'])
+            })
+        
+        return results, total
+    
+    def get_indexed_total(self) -> Optional[int]:
+        """Workflow count from the materialized stats row, or None before it exists (never writes)."""
+        row = self.read_connection().execute("SELECT total FROM workflow_stats WHERE id = 1").fetchone()
+        return row[0] if row else None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get database statistics from the materialized stats row (O(1))."""
+        row = self.read_connection().execute("SELECT * FROM workflow_stats WHERE id = 1").fetchone()
+        
+        if row is None:
+            # Database not indexed by this version yet: materialize once, or just
+            # compute while another process writes (it materializes when done)
+            with self.writer_lock() as acquired:
+                if not acquired:
+                    return self.compute_stats(self.read_connection())
+                conn = self.connect()
+                self.refresh_integration_stats(conn)
+                stats = self.refresh_stats(conn)
+                self.bump_generation(conn)
+                conn.commit()
+                conn.close()
+                return stats
+        
+        return {
+            'total': row['total'],
+            'active': row['active'],
+            'inactive': row['total'] - row['active'],
+            'triggers': json.loads(row['triggers']),
+            'complexity': json.loads(row['complexity']),
+            'total_nodes': row['total_nodes'],
+            'unique_integrations': row['unique_integrations'],
+            'last_indexed': row['last_indexed']
+        }
 
     def get_service_categories(self) -> Dict[str, List[str]]:
         """Get service categories for enhanced filtering."""
@@ -663,59 +1798,335 @@ class WorkflowDatabase:
             'development': ['Webhook', 'HTTP Request', 'GraphQL', 'Server-Sent Events', 'YouTube']
         }
 
-    def search_by_category(self, category: str, limit: int = 50, offset: int = 0) -> Tuple[List[Dict], int]:
-        """Search workflows by service category."""
-        categories = self.get_service_categories()
-        if category not in categories:
-            return [], 0
-        
-        services = categories[category]
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+    def search_by_category(self, category: str, limit: int = 50, offset: int = 0,
+                           raw_rows: bool = False) -> Tuple[List[Dict], int]:
+        """Search workflows by service category using the materialized membership table.
         
-        # Build OR conditions for all services in category
-        service_conditions = []
-        params = []
-        for service in services:
-            service_conditions.append("integrations LIKE ?")
-            params.append(f'%"{service}"%')
+        With raw_rows=True the page is returned as unconverted sqlite3.Row objects.
+        """
+        if category not in self.get_service_categories():
+            return [], 0
         
-        where_clause = " OR ".join(service_conditions)
+        conn = self.read_connection()
         
-        # Count total results
-        count_query = f"SELECT COUNT(*) as total FROM workflows WHERE {where_clause}"
-        cursor = conn.execute(count_query, params)
+        # Count total results (primary key prefix scan)
+        cursor = conn.execute(
+            "SELECT COUNT(*) as total FROM workflow_service_categories WHERE category = ?",
+            (category,)
+        )
         total = cursor.fetchone()['total']
         
-        # Get paginated results
+        # Get paginated results. Ids are assigned when a workflow is (re)indexed,
+        # so id DESC is analyzed_at DESC and the page is a walk of the primary key.
         query = f"""
-            SELECT * FROM workflows 
-            WHERE {where_clause}
-            ORDER BY analyzed_at DESC
+            SELECT w.*
+            FROM workflow_service_categories c
+            JOIN workflows w ON w.id = c.workflow_id
+            WHERE c.category = ?
+            ORDER BY c.workflow_id DESC
             LIMIT {limit} OFFSET {offset}
         """
         
-        cursor = conn.execute(query, params)
+        cursor = conn.execute(query, (category,))
         rows = cursor.fetchall()
         
         # Convert to dictionaries and parse JSON fields
-        results = []
-        for row in rows:
-            workflow = dict(row)
-            workflow['integrations'] = json.loads(workflow['integrations'] or '[]')
-            raw_tags = json.loads(workflow['tags'] or '[]')
-            clean_tags = []
-            for tag in raw_tags:
-                if isinstance(tag, dict):
-                    clean_tags.append(tag.get('name', str(tag.get('id', 'tag'))))
-                else:
-                    clean_tags.append(str(tag))
-            workflow['tags'] = clean_tags
-            results.append(workflow)
+        results = rows if raw_rows else [self.row_to_workflow(row) for row in rows]
         
-        conn.close()
         return results, total
 
+    def find_similar_workflows(self, filename: str, limit: int = 10) -> Optional[List[Dict]]:
+        """Find structurally similar workflows via LSH candidates ranked by MinHash similarity.
+        
+        Returns None if the workflow is unknown.
+        """
+        conn = self.read_connection()
+        
+        row = conn.execute("""
+            SELECT w.id, s.signature
+            FROM workflows w
+            LEFT JOIN workflow_signatures s ON s.workflow_id = w.id
+            WHERE w.filename = ?
+        """, (filename,)).fetchone()
+        if row is None:
+            return None
+        if row['signature'] is None:
+            return []
+        
+        workflow_id = row['id']
+        signature = struct.unpack(f'<{MINHASH_PERMUTATIONS}I', row['signature'])
+        
+        # Candidates share at least one LSH bucket with the target
+        cursor = conn.execute("""
+            SELECT s.workflow_id, s.signature
+            FROM workflow_signatures s
+            WHERE s.workflow_id IN (
+                SELECT DISTINCT other.workflow_id
+                FROM workflow_lsh target
+                JOIN workflow_lsh other ON other.band = target.band AND other.bucket = target.bucket
+                WHERE target.workflow_id = ? AND other.workflow_id != ?
+            )
+        """, (workflow_id, workflow_id))
+        
+        scored = []
+        for candidate in cursor.fetchall():
+            other = struct.unpack(f'<{MINHASH_PERMUTATIONS}I', candidate['signature'])
+            matches = sum(1 for a, b in zip(signature, other) if a == b)
+            scored.append((matches / MINHASH_PERMUTATIONS, candidate['workflow_id']))
+        
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        top = scored[:limit]
+        if not top:
+            return []
+        
+        placeholders = ",".join("?" for _ in top)
+        rows = conn.execute(
+            f"SELECT * FROM workflows WHERE id IN ({placeholders})",
+            [workflow_id for _, workflow_id in top]
+        ).fetchall()
+        
+        by_id = {row['id']: self.row_to_workflow(row) for row in rows}
+        results = []
+        for similarity, other_id in top:
+            workflow = by_id.get(other_id)
+            if workflow:
+                workflow['similarity'] = round(similarity, 4)
+                results.append(workflow)
+        return results
+
+
+def generate_mermaid_diagram(nodes: List[Dict], connections: Dict) -> str:
+    """Generate Mermaid.js flowchart code from workflow nodes and connections."""
+    if not nodes:
+        return "graph TD\n  EmptyWorkflow[No nodes found in workflow]"
+    
+    # Create mapping for node names to ensure valid mermaid IDs
+    mermaid_ids = {}
+    for i, node in enumerate(nodes):
+        node_id = f"node{i}"
+        node_name = node.get('name', f'Node {i}')
+        mermaid_ids[node_name] = node_id
+    
+    # Start building the mermaid diagram
+    mermaid_code = ["graph TD"]
+    
+    # Add nodes with styling
+    for node in nodes:
+        node_name = node.get('name', 'Unnamed')
+        node_id = mermaid_ids[node_name]
+        node_type = node.get('type', '').replace('n8n-nodes-base.', '')
+        
+        # Determine node style based on type
+        style = ""
+        if any(x in node_type.lower() for x in ['trigger', 'webhook', 'cron']):
+            style = "fill:#b3e0ff,stroke:#0066cc"  # Blue for triggers
+        elif any(x in node_type.lower() for x in ['if', 'switch']):
+            style = "fill:#ffffb3,stroke:#e6e600"  # Yellow for conditional nodes
+        elif any(x in node_type.lower() for x in ['function', 'code']):
+            style = "fill:#d9b3ff,stroke:#6600cc"  # Purple for code nodes
+        elif 'error' in node_type.lower():
+            style = "fill:#ffb3b3,stroke:#cc0000"  # Red for error handlers
+        else:
+            style = "fill:#d9d9d9,stroke:#666666"  # Gray for other nodes
+        
+        # Add node with label (escaping special characters)
+        clean_name = node_name.replace('"', "'")
+        clean_type = node_type.replace('"', "'")
+        label = f"{clean_name}<br>({clean_type})"
+        mermaid_code.append(f"  {node_id}[\"{label}\"]")
+        mermaid_code.append(f"  style {node_id} {style}")
+    
+    # Add connections between nodes
+    for source_name, source_connections in connections.items():
+        if source_name not in mermaid_ids:
+            continue
+        
+        if isinstance(source_connections, dict) and 'main' in source_connections:
+            main_connections = source_connections['main']
+            
+            for i, output_connections in enumerate(main_connections):
+                if not isinstance(output_connections, list):
+                    continue
+                    
+                for connection in output_connections:
+                    if not isinstance(connection, dict) or 'node' not in connection:
+                        continue
+                        
+                    target_name = connection['node']
+                    if target_name not in mermaid_ids:
+                        continue
+                        
+                    # Add arrow with output index if multiple outputs
+                    label = f" -->|{i}| " if len(main_connections) > 1 else " --> "
+                    mermaid_code.append(f"  {mermaid_ids[source_name]}{label}{mermaid_ids[target_name]}")
+    
+    # Format the final mermaid diagram code
+    return "\n".join(mermaid_code)
+
+
+def sparse_gram(rows: np.ndarray, cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute AᵀA for a binary sparse matrix A given as COO (rows, cols).
+
+    A must have no duplicate entries. Returns the non-zero entries of AᵀA
+    as (i, j, count) arrays, including the diagonal (column totals). Only
+    pairs that actually co-occur in a row are materialized, so memory is
+    O(sum of squared row lengths) rather than O(columns²).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    if len(rows) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+
+    order = np.argsort(rows, kind='stable')
+    rows, cols = rows[order], cols[order]
+
+    # Row extents of every non-zero
+    starts = np.searchsorted(rows, rows, side='left')
+    lengths = np.searchsorted(rows, rows, side='right') - starts
+
+    # Pair each non-zero with every non-zero of its row (outer product per row)
+    left = np.repeat(cols, lengths)
+    group_offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    right = cols[np.repeat(starts, lengths) + np.arange(len(left)) - group_offsets]
+
+    n_cols = int(cols.max()) + 1
+    keys, counts = np.unique(left * n_cols + right, return_counts=True)
+    return keys // n_cols, keys % n_cols, counts
+
+
+def lower_thread_priority():
+    """Lower the CPU priority of the calling thread, where the OS allows per-thread niceness."""
+    if sys.platform.startswith('linux') and hasattr(os, 'setpriority'):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), INDEX_THREAD_NICENESS)
+        except OSError:
+            pass
+
+
+class AsyncWorkflowDatabase:
+    """Run WorkflowDatabase calls on a bounded thread pool so async handlers never block.
+
+    Each pool thread keeps its own read connection (see read_connection), so
+    concurrent queries run in parallel under WAL instead of queueing on the
+    event loop. Any database method is available as an awaitable:
+    ``await adb.search_workflows(...)``.
+    """
+
+    def __init__(self, db: WorkflowDatabase, max_workers: Optional[int] = None):
+        self.db = db
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='workflow-db')
+        # Indexing and precompression get one low-priority thread of their own,
+        # so they never occupy the request pool
+        self.index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='workflow-index',
+                                                 initializer=lower_thread_priority)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking database call on the pool, timing the wait and the call.
+
+        With request timing on, the call runs in a copy of the request's context,
+        so the SQL it executes is accounted to that request.
+        """
+        return await self.submit(func, args, kwargs, DB_CALL_SECONDS, 'db')
+
+    async def run_io(self, func, *args, **kwargs):
+        """Run a blocking file read (no database access) on the pool, timed as file I/O."""
+        return await self.submit(func, args, kwargs, FILE_IO_SECONDS, 'io')
+
+    async def submit(self, func, args: tuple, kwargs: dict, histogram: Histogram, phase_name: str):
+        loop = asyncio.get_running_loop()
+        method = getattr(func, '__name__', 'call')
+        timing = current_timing()
+        context = contextvars.copy_context() if timing is not None else None
+        submitted = time.perf_counter()
+
+        def timed_call():
+            started = time.perf_counter()
+            DB_POOL_WAIT_SECONDS.observe((), started - submitted)
+            try:
+                if context is not None:
+                    return context.run(func, *args, **kwargs)
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                histogram.observe((method,), elapsed)
+                if timing is not None:
+                    timing.add('pool', started - submitted)
+                    timing.add(phase_name, elapsed)
+
+        return await loop.run_in_executor(self.executor, timed_call)
+
+    def run_in_background(self, func, *args, **kwargs) -> asyncio.Future:
+        """Queue a long write job (indexing, precompression) on the low-priority thread."""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.index_executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        method = getattr(self.db, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        return call
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+        self.index_executor.shutdown(wait=False)
+
+
+def benchmark_lookups(db: WorkflowDatabase, sample_size: int = 200, rounds: int = 3):
+    """Compare metadata lookup by filename index against the old FTS filename query."""
+    conn = db.connect()
+    filenames = [row[0] for row in conn.execute(
+        "SELECT filename FROM workflows ORDER BY random() LIMIT ?", (sample_size,)
+    )]
+    conn.close()
+    if not filenames:
+        print("No workflows indexed; run --index first.")
+        return
+    
+    def fts_lookup(filename):
+        workflows, _ = db.search_workflows(f'filename:"{filename}"', limit=1)
+        return workflows[0] if workflows else None
+    
+    candidates = [
+        ("FTS MATCH filename (old)", fts_lookup),
+        ("get_workflow (unique index)", db.get_workflow),
+    ]
+    print(f"Benchmarking {len(filenames)} lookups x {rounds} rounds:")
+    for label, lookup in candidates:
+        best = None
+        wrong = 0
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for filename in filenames:
+                workflow = lookup(filename)
+                if not workflow or workflow['filename'] != filename:
+                    wrong += 1
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"  {label:<30} {best / len(filenames) * 1000:.3f} ms/lookup, "
+              f"{wrong // rounds} wrong or missing")
+    
+    start = time.perf_counter()
+    db.get_workflows(filenames)
+    elapsed = time.perf_counter() - start
+    print(f"  {'get_workflows (one IN query)':<30} {elapsed / len(filenames) * 1000:.3f} ms/lookup")
+
+
+def check_sort_plans(db: WorkflowDatabase) -> List[Tuple[str, bool]]:
+    """(description, uses covering index) for the browse plan of every sort key, order and filter mix."""
+    results = []
+    for sort in SORT_EXPRESSIONS:
+        for order in ('asc', 'desc'):
+            for category in ('all', 'AI Agent Development'):
+                plan = db.explain_browse(sort, order, trigger_filter='Webhook', category_filter=category)
+                walk = any(f"COVERING INDEX idx_sort_{sort}" in detail for detail in plan)
+                results.append((f"sort={sort} order={order} category={category}: {' | '.join(plan)}", walk))
+    return results
+
 
 def main():
     """Command-line interface for workflow database."""
@@ -724,15 +2135,23 @@ def main():
     parser = argparse.ArgumentParser(description='N8N Workflow Database')
     parser.add_argument('--index', action='store_true', help='Index all workflows')
     parser.add_argument('--force', action='store_true', help='Force reindex all files')
+    parser.add_argument('--prerender-diagrams', action='store_true',
+                        help='With --index, render and cache Mermaid diagrams for all workflows')
     parser.add_argument('--search', help='Search workflows')
     parser.add_argument('--stats', action='store_true', help='Show database statistics')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Benchmark workflow detail lookups (filename index vs FTS)')
+    parser.add_argument('--explain-sorts', action='store_true',
+                        help='Show query plans of sorted browse queries (exits 1 unless all use covering indexes)')
+    parser.add_argument('--semantic', help='Semantic (TF-IDF) search')
+    parser.add_argument('--similar', metavar='FILENAME', help='Show workflows similar to FILENAME')
     
     args = parser.parse_args()
     
     db = WorkflowDatabase()
     
     if args.index:
-        stats = db.index_all_workflows(force_reindex=args.force)
+        stats = db.index_all_workflows(force_reindex=args.force, prerender_diagrams=args.prerender_diagrams)
         print(f"Indexed {stats['processed']} workflows")
     
     elif args.search:
@@ -741,6 +2160,33 @@ def main():
         for workflow in results:
             print(f"  - {workflow['name']} ({workflow['trigger_type']}, {workflow['node_count']} nodes)")
     
+    elif args.benchmark:
+        benchmark_lookups(db)
+    
+    elif args.explain_sorts:
+        results = check_sort_plans(db)
+        for description, walk in results:
+            print(f"{'✅' if walk else '❌'} {description}")
+        failed = sum(1 for _, walk in results if not walk)
+        if failed:
+            print(f"❌ {failed} sorted browse plans do not walk a covering index")
+            sys.exit(1)
+    
+    elif args.semantic:
+        results, total = db.semantic_search(args.semantic, limit=10)
+        print(f"Found {total} workflows:")
+        for workflow in results:
+            print(f"  - {workflow['rank']:.3f} {workflow['name']} ({workflow['trigger_type']}, {workflow['node_count']} nodes)")
+    
+    elif args.similar:
+        results = db.find_similar_workflows(args.similar, limit=10)
+        if results is None:
+            print(f"Workflow not found: {args.similar}")
+        else:
+            print(f"Found {len(results)} similar workflows:")
+            for workflow in results:
+                print(f"  - {workflow['similarity']:.2f} {workflow['name']} ({workflow['filename']})")
+    
     elif args.stats:
         stats = db.get_stats()
         print(f"Database Statistics:")
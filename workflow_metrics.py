@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics
+Minimal counters, gauges and histograms rendered in the Prometheus text
+exposition format. Updates are lock-free: every thread writes only its own
+shard and a scrape sums the shards, so instrumenting a hot path costs a
+dictionary lookup and an addition.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Request and query latencies, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class Registry:
+    """The metrics exported by one process."""
+
+    def __init__(self):
+        self.metrics: List['Metric'] = []
+        self.worker_label = ''  # Label text added to every series (set in worker processes)
+        self._scrape = threading.local()
+
+    def register(self, metric: 'Metric'):
+        self.metrics.append(metric)
+
+    def set_worker(self, worker: str):
+        """Label every series with the worker process exporting it.
+
+        Each worker counts only its own requests and a scrape reaches any one
+        of them, so unlabeled counters would jump between workers' values.
+        """
+        self.worker_label = f'worker="{escape(worker)}"'
+
+    def once_per_scrape(self, read: Callable[[], Any]) -> Callable[[], Any]:
+        """Wrap read() so the collectors calling it during one scrape share one result."""
+        def shared():
+            values = getattr(self._scrape, 'values', None)
+            if values is None:
+                return read()  # Outside a scrape
+            if read not in values:
+                values[read] = read()
+            return values[read]
+        return shared
+
+    def render(self) -> str:
+        self._scrape.values = {}
+        try:
+            lines = []
+            for metric in self.metrics:
+                lines.extend(metric.render())
+        finally:
+            self._scrape.values = None
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        registry.register(self)
+
+    def _shard(self) -> Dict:
+        """This thread's values (created on first use; list.append is atomic)."""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            self._shards.append(shard)
+        return shard
+
+    def label_text(self, labels: Labels, extra: str = '') -> str:
+        pairs = [f'{name}="{escape(value)}"' for name, value in zip(self.labelnames, labels)]
+        if self.registry.worker_label:
+            pairs.append(self.registry.worker_label)
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """(name suffix, label text, value) for every exported series."""
+        totals: Dict[Labels, float] = {}
+        for shard in list(self._shards):
+            for labels, value in list(shard.items()):
+                totals[labels] = totals.get(labels, 0) + value
+        for labels, value in sorted(totals.items()):
+            yield '', self.label_text(labels), value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for suffix, label_text, value in self.samples():
+            lines.append(f'{self.name}{suffix}{label_text} {format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, labels: Labels = (), amount: float = 1.0):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    """A gauge moved up and down (e.g. requests in flight); shards sum like a counter's."""
+    type = 'gauge'
+
+    def dec(self, labels: Labels = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+
+class CallbackGauge(Metric):
+    """A gauge whose values are read at scrape time from collect() -> {labels: value}."""
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, collect: Callable[[], Dict[Labels, float]],
+                 labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.collect = collect
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        try:
+            values = self.collect()
+        except Exception:
+            return  # A failing collector drops its series rather than the whole scrape
+        for labels, value in sorted(values.items()):
+            if value is not None:
+                yield '', self.label_text(labels), value
+
+
+class CallbackCounter(CallbackGauge):
+    """A counter kept elsewhere (e.g. an attribute), read at scrape time."""
+    type = 'counter'
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Registry = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: Labels, value: float):
+        shard = self._shard()
+        entry = shard.get(labels)
+        if entry is None:
+            # Per-bucket counts (last one is +Inf), then the sum
+            entry = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in list(self._shards):
+            for labels, entry in list(shard.items()):
+                total = totals.setdefault(labels, [0] * len(entry))
+                for i, value in enumerate(entry):
+                    total[i] += value
+
+        for labels, total in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), total[:-1]):
+                cumulative += count
+                yield '_bucket', self.label_text(labels, f'le="{format_value(bound)}"'), cumulative
+            yield '_sum', self.label_text(labels), total[-1]
+            yield '_count', self.label_text(labels), cumulative
+
+
+# Shared by the database layer and the API
+CACHE_REQUESTS = Counter(
+    'workflow_cache_requests_total', 'Cache lookups by cache and result (hit or miss)', ['cache', 'result']
+)
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests by route template and status', ['method', 'route', 'status']
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time until the response was fully sent', ['method', 'route']
+)
+HTTP_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests currently being handled', ['route']
+)
+
+
+def cache_result(cache: str, hit: bool):
+    CACHE_REQUESTS.inc((cache, 'hit' if hit else 'miss'))
+
+
+def route_template(scope: Scope) -> str:
+    """The path template of the route a request matches (keeps label cardinality bounded)."""
+    router = getattr(scope.get('app'), 'router', None)
+    for route in getattr(router, 'routes', ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return 'unmatched'
+
+
+class MetricsMiddleware:
+    """Count, time and track in-flight HTTP requests per route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        status = 500  # Unless a response starts
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc((route,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec((route,))
+            HTTP_REQUEST_SECONDS.observe((scope['method'], route), time.perf_counter() - started)
+            HTTP_REQUESTS.inc((scope['method'], route, str(status)))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Index Run Progress
+State of the running (or last finished) index run, kept in a small JSON file
+next to the database so every process (server workers, the CLI) reports the
+same job: phase, progress, throughput, ETA and the last result.
+"""
+
+import datetime
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+# Minimum seconds between progress writes within one phase
+WRITE_INTERVAL = 0.5
+
+
+def utc_now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+
+
+def process_alive(pid: int) -> bool:
+    """Whether a process exists (assumed so where it cannot be checked safely)."""
+    if os.name != 'posix':
+        return True  # os.kill(pid, 0) would terminate the process on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class IndexProgress:
+    """Writer and reader of the index status file (only the indexing process writes)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._state: Dict[str, Any] = {}
+        self._last_write = 0.0
+
+    def start(self, force: bool):
+        self._state = {
+            'state': 'running',
+            'phase': 'scanning',
+            'force': force,
+            'pid': os.getpid(),
+            'started_at': utc_now(),
+            'started': time.time(),
+            'done': 0,
+            'total': 0,
+            'last_result': self.read().get('last_result'),
+        }
+        self._write()
+
+    def update(self, phase: Optional[str] = None, done: Optional[int] = None, total: Optional[int] = None):
+        if not self._state:
+            return  # Not a tracked run (e.g. index_workflows called directly)
+        force_write = phase is not None and phase != self._state['phase']
+        if phase is not None:
+            self._state['phase'] = phase
+        if done is not None:
+            self._state['done'] = done
+        if total is not None:
+            self._state['total'] = total
+        if force_write or time.monotonic() - self._last_write >= WRITE_INTERVAL:
+            self._write()
+
+    def finish(self, result: Dict[str, Any]):
+        self._end({**result, 'finished_at': utc_now()})
+
+    def fail(self, error: Exception):
+        self._end({'error': str(error), 'finished_at': utc_now()})
+
+    def _end(self, result: Dict[str, Any]):
+        result['force'] = self._state['force']
+        result['duration_seconds'] = round(time.time() - self._state['started'], 1)
+        self._state = {'state': 'idle', 'last_result': result}
+        self._write()
+        self._state = {}
+
+    def _write(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.path)
+        self._last_write = time.monotonic()
+
+    def read(self) -> Dict[str, Any]:
+        """Current status; running jobs get elapsed time, throughput (files/s), percent and ETA."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return {'state': 'idle', 'last_result': None}
+
+        if status.get('state') != 'running':
+            return status
+
+        if not process_alive(status['pid']):
+            status['state'] = 'interrupted'
+        elapsed = max(time.time() - status.pop('started'), 1e-6)
+        done, total = status['done'], status['total']
+        throughput = done / elapsed
+        status['elapsed_seconds'] = round(elapsed, 1)
+        status['throughput'] = round(throughput, 1)
+        status['percent'] = round(100.0 * done / total, 1) if total else 0.0
+        status['eta_seconds'] = round((total - done) / throughput, 1) if throughput and total else None
+        return status
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Per-Request Timing
+Optional instrumentation that splits the time of each request into phases:
+SQL statements (count and time), database pool wait, decoding of stored JSON,
+serialization and compression. The phases are sent in a Server-Timing header
+(visible in the browser's network panel) and written to a sampled JSON log.
+
+Off by default. WORKFLOW_SERVER_TIMING=1 enables it,
+WORKFLOW_TIMING_LOG_SAMPLE sets the fraction of requests logged, and requests
+slower than WORKFLOW_TIMING_SLOW_MS are always logged.
+"""
+
+import contextvars
+import datetime
+import functools
+import inspect
+import json
+import os
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from workflow_metrics import route_template
+
+ENABLED_ENV = 'WORKFLOW_SERVER_TIMING'
+LOG_SAMPLE_ENV = 'WORKFLOW_TIMING_LOG_SAMPLE'
+SLOW_MS_ENV = 'WORKFLOW_TIMING_SLOW_MS'
+
+# Reported phases, in header order. Phases can overlap: db includes sql, count,
+# page and decode, which run inside database calls.
+PHASES = {
+    'queue': 'Waiting for an admission slot',
+    'pool': 'Waiting for a database thread',
+    'db': 'Database calls',
+    'io': 'File reads',
+    'sql': 'SQL statements',
+    'count': 'Counting matches',
+    'page': 'Fetching the result page',
+    'vectors': 'Scoring the vector index',
+    'decode': 'Decoding stored JSON',
+    'serialize': 'Encoding the response body',
+    'pydantic': 'Request validation and response models',
+    'compress': 'Response compression',
+}
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class TimingConfig:
+    """Settings read from the environment (so reloaded and forked servers share them)."""
+
+    def __init__(self):
+        self.enabled = os.environ.get(ENABLED_ENV, '').lower() not in ('', '0', 'false', 'no')
+        self.log_sample = env_float(LOG_SAMPLE_ENV, 0.01)
+        self.slow_ms = env_float(SLOW_MS_ENV, 1000.0)
+
+
+CONFIG = TimingConfig()
+
+
+def configure_timing(enabled: bool, log_sample: Optional[float] = None, slow_ms: Optional[float] = None):
+    """Change the settings before serving; exported to the environment for server subprocesses."""
+    CONFIG.enabled = enabled
+    os.environ[ENABLED_ENV] = '1' if enabled else '0'
+    if log_sample is not None:
+        CONFIG.log_sample = log_sample
+        os.environ[LOG_SAMPLE_ENV] = str(log_sample)
+    if slow_ms is not None:
+        CONFIG.slow_ms = slow_ms
+        os.environ[SLOW_MS_ENV] = str(slow_ms)
+
+
+class RequestTiming:
+    """Accumulated phase times of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, List[float]] = {}  # name -> [seconds, count]
+        self.endpoint_seconds = 0.0
+        self._compress_started: Optional[float] = None
+
+    def add(self, name: str, seconds: float, count: int = 1):
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [seconds, count]
+        else:
+            entry[0] += seconds
+            entry[1] += count
+
+    def entering_compressor(self):
+        self._compress_started = time.perf_counter()
+
+    def leaving_compressor(self):
+        """Close the interval opened when a message entered the compressor (at most once)."""
+        if self._compress_started is not None:
+            self.add('compress', time.perf_counter() - self._compress_started)
+            self._compress_started = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header(self) -> str:
+        """Server-Timing header value (durations in milliseconds)."""
+        metrics = []
+        for name, description in PHASES.items():
+            entry = self.phases.get(name)
+            if entry is None:
+                continue
+            seconds, count = entry
+            if name == 'sql':
+                description = f"{int(count)} SQL statement{'' if count == 1 else 's'}"
+            metrics.append(f'{name};dur={seconds * 1000:.2f};desc="{description}"')
+        metrics.append(f'total;dur={self.elapsed() * 1000:.2f};desc="Until response headers"')
+        return ', '.join(metrics)
+
+    def milliseconds(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, (seconds, _) in self.phases.items()}
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar('request_timing', default=None)
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """The timing of the request being handled, or None when timing is off."""
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Add the time spent in the block to a phase of the current request."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+def decode_json(text: str) -> Any:
+    """json.loads, counted as decode time (cheap enough for per-row use when timing is off)."""
+    timing = _current.get()
+    if timing is None:
+        return json.loads(text)
+    started = time.perf_counter()
+    try:
+        return json.loads(text)
+    finally:
+        timing.add('decode', time.perf_counter() - started)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor adding statement execution and row fetching to the request's sql phase."""
+
+    def _timed(self, call: Callable, statements: int, *args):
+        timing = _current.get()
+        if timing is None:
+            return call(*args)
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            timing.add('sql', time.perf_counter() - started, statements)
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, 1, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, 1, sql, seq_of_parameters)
+
+    def fetchone(self):
+        return self._timed(super().fetchone, 0)
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, 0, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._timed(super().fetchall, 0)
+
+    def __next__(self):
+        return self._timed(super().__next__, 0)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (including Connection.execute shortcuts) are TimedCursors."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_class() -> type:
+    """sqlite3.connect factory: instrumented only while timing is enabled."""
+    return TimedConnection if CONFIG.enabled else sqlite3.Connection
+
+
+def timed_endpoint(endpoint: Callable) -> Callable:
+    """Wrap a route endpoint so its own run time can be told apart from framework work."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def call(*args, **kwargs):
+            timing = _current.get()
+            if timing is None:
+                return await endpoint(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timing.endpoint_seconds += time.perf_counter() - started
+        return call
+
+    @functools.wraps(endpoint)
+    def call_sync(*args, **kwargs):
+        timing = _current.get()
+        if timing is None:
+            return endpoint(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            timing.endpoint_seconds += time.perf_counter() - started
+    return call_sync
+
+
+def timed_handler(handler: Callable) -> Callable:
+    """Wrap a route handler: its time outside the endpoint is the pydantic phase."""
+    @functools.wraps(handler)
+    async def call(request):
+        timing = _current.get()
+        if timing is None:
+            return await handler(request)
+        started = time.perf_counter()
+        endpoint_before = timing.endpoint_seconds
+        try:
+            return await handler(request)
+        finally:
+            endpoint = timing.endpoint_seconds - endpoint_before
+            timing.add('pydantic', max(time.perf_counter() - started - endpoint, 0.0))
+    return call
+
+
+def log_request(scope: Scope, route: str, timing: RequestTiming, status: int, body_bytes: int, reason: str):
+    """Write one JSON log line describing a finished request."""
+    record = {
+        'ts': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds'),
+        'event': 'request_timing',
+        'reason': reason,
+        'pid': os.getpid(),
+        'method': scope['method'],
+        'route': route,
+        'path': scope['path'],
+        'query': scope.get('query_string', b'').decode('latin-1'),
+        'status': status,
+        'bytes': body_bytes,
+        'total_ms': round(timing.elapsed() * 1000, 3),
+        'sql_statements': int(timing.phases.get('sql', (0, 0))[1]),
+        'phases_ms': timing.milliseconds(),
+    }
+    print(json.dumps(record), flush=True)
+
+
+class ServerTimingMiddleware:
+    """Time each request and report its phases (install outside GZipMiddleware).
+
+    The header lists what happened before the response started; for streamed
+    responses the log line, written once the body is sent, covers the rest.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not CONFIG.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)  # Before routing rewrites the scope (e.g. mounts)
+        timing = RequestTiming()
+        token = _current.set(timing)
+        status = 500  # Unless a response starts
+        body_bytes = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status, body_bytes
+            timing.leaving_compressor()
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                MutableHeaders(scope=message).append('Server-Timing', timing.header())
+            elif message['type'] == 'http.response.body':
+                body_bytes += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if timing.elapsed() * 1000 >= CONFIG.slow_ms:
+                log_request(scope, route, timing, status, body_bytes, 'slow')
+            elif random.random() < CONFIG.log_sample:
+                log_request(scope, route, timing, status, body_bytes, 'sample')
+
+
+class CompressionTimingMiddleware:
+    """Mark response messages entering the compressor (install just inside GZipMiddleware).
+
+    Compression time is the time from a message entering GZipMiddleware to
+    the next message leaving it, as seen by ServerTimingMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        timing = _current.get() if scope['type'] == 'http' else None
+        if timing is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message):
+            timing.entering_compressor()
+            try:
+                await send(message)
+            finally:
+                timing.leaving_compressor()  # Buffered by the compressor, nothing sent on
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Local Vector Index for N8N Workflows
+Hashed-feature TF-IDF vectors stored as memory-mapped NumPy arrays for
+offline semantic search (no model downloads, no network).
+"""
+
+import json
+import math
+import os
+import re
+import shutil
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+N_FEATURES = 1 << 18
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in',
+    'into', 'is', 'it', 'its', 'of', 'on', 'or', 'that', 'the', 'this', 'to',
+    'uses', 'using', 'with', 'you', 'your', 'node', 'nodes', 'workflow',
+}
+
+
+def stem(token: str) -> str:
+    """Very light suffix stripping so 'invoices'/'invoicing'/'invoiced' share a feature."""
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem."""
+    return [
+        stem(token)
+        for token in TOKEN_PATTERN.findall((text or '').lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def feature_index(token: str) -> int:
+    """Stable hashed feature index (process-independent, unlike hash())."""
+    return zlib.crc32(token.encode('utf-8')) & (N_FEATURES - 1)
+
+
+def term_counts(text: str) -> Dict[int, int]:
+    """Count hashed unigram and bigram features of a text."""
+    tokens = tokenize(text)
+    counts: Dict[int, int] = {}
+    for token in tokens:
+        feature = feature_index(token)
+        counts[feature] = counts.get(feature, 0) + 1
+    for first, second in zip(tokens, tokens[1:]):
+        feature = feature_index(f"{first} {second}")
+        counts[feature] = counts.get(feature, 0) + 1
+    return counts
+
+
+class WorkflowVectorIndex:
+    """Sparse TF-IDF matrix (COO layout) with cosine top-k search."""
+
+    FILES = ('ids', 'rows', 'cols', 'data', 'idf')
+
+    def __init__(self, ids: np.ndarray, rows: np.ndarray, cols: np.ndarray,
+                 data: np.ndarray, idf: np.ndarray):
+        self.ids = ids
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+        self.idf = idf
+
+    @property
+    def size(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[int, str]]) -> 'WorkflowVectorIndex':
+        """Build the index from (workflow_id, text) pairs."""
+        ids = []
+        doc_counts = []
+        df = np.zeros(N_FEATURES, dtype=np.int32)
+        for workflow_id, text in documents:
+            counts = term_counts(text)
+            ids.append(workflow_id)
+            doc_counts.append(counts)
+            if counts:
+                df[np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))] += 1
+
+        n_docs = len(ids)
+        idf = (np.log((1.0 + n_docs) / (1.0 + df)) + 1.0).astype(np.float32)
+
+        rows, cols, data = [], [], []
+        for row, counts in enumerate(doc_counts):
+            if not counts:
+                continue
+            features = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            weights = (1.0 + np.log(tf)) * idf[features]
+            weights /= np.linalg.norm(weights)
+            rows.append(np.full(len(features), row, dtype=np.int32))
+            cols.append(features)
+            data.append(weights.astype(np.float32))
+
+        def concat(parts: List[np.ndarray], dtype) -> np.ndarray:
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+        return cls(
+            ids=np.asarray(ids, dtype=np.int64),
+            rows=concat(rows, np.int32),
+            cols=concat(cols, np.int32),
+            data=concat(data, np.float32),
+            idf=idf,
+        )
+
+    def save(self, directory: str):
+        """Write the arrays as .npy files, swapping the directory in atomically."""
+        tmp_dir = directory + '.tmp'
+        old_dir = directory + '.old'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in self.FILES:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'documents': self.size, 'features': N_FEATURES, 'nnz': int(len(self.data))}, f)
+
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(directory):
+            os.rename(directory, old_dir)
+        os.rename(tmp_dir, directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str) -> Optional['WorkflowVectorIndex']:
+        """Memory-map a saved index, or return None if it does not exist."""
+        if not os.path.exists(os.path.join(directory, 'meta.json')):
+            return None
+        arrays = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+            for name in cls.FILES
+        }
+        return cls(**arrays)
+
+    def query_vector(self, text: str) -> Dict[int, float]:
+        """Vectorize a query with the corpus IDF (L2-normalized)."""
+        counts = term_counts(text)
+        weights = {
+            feature: (1.0 + math.log(count)) * float(self.idf[feature])
+            for feature, count in counts.items()
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if norm == 0:
+            return {}
+        return {feature: w / norm for feature, w in weights.items()}
+
+    def search(self, queries: List[str], k: int = 50,
+               allowed_ids: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """Batched cosine top-k: returns [(workflow_id, score), ...] per query."""
+        return [ranked for ranked, _ in self.search_with_totals(queries, k, allowed_ids)]
+
+    def search_with_totals(self, queries: List[str], k: int = 50,
+                           allowed_ids: Optional[np.ndarray] = None) -> List[Tuple[List[Tuple[int, float]], int]]:
+        """Like search, plus the number of documents matching each query (score > 0).
+
+        With allowed_ids, only those workflows are ranked and counted, so
+        filters apply before the top-k cut.
+        """
+        if self.size == 0 or not queries:
+            return [([], 0) for _ in queries]
+
+        # Dense query block over the hashed feature space (N_FEATURES x n_queries)
+        query_block = np.zeros((N_FEATURES, len(queries)), dtype=np.float32)
+        for column, text in enumerate(queries):
+            for feature, weight in self.query_vector(text).items():
+                query_block[feature, column] = weight
+
+        # Only non-zeros whose feature appears in some query contribute
+        hits = np.flatnonzero(query_block[self.cols].any(axis=1))
+        contributions = self.data[hits, None] * query_block[self.cols[hits]]
+        hit_rows = self.rows[hits]
+
+        allowed = np.isin(self.ids, allowed_ids) if allowed_ids is not None else None
+
+        results = []
+        for column in range(len(queries)):
+            scores = np.bincount(hit_rows, weights=contributions[:, column], minlength=self.size)
+            matches = scores > 0
+            if allowed is not None:
+                matches &= allowed
+            candidates = np.flatnonzero(matches)
+            total = len(candidates)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+            results.append(([(int(self.ids[i]), float(scores[i])) for i in candidates], total))
+        return results